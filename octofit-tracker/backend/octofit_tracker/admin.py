@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Team, Activity, Leaderboard, Workout
+from .credentials import hash_password
+from .models import User, Team, Activity, ActivityRollup, Job, Leaderboard, LeaderboardSnapshot, TeamStanding, Workout
 
 
 @admin.register(User)
@@ -9,6 +10,11 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('name', 'email', 'team')
     readonly_fields = ('_id', 'created_at')
     fields = ('name', 'email', 'password', 'team', 'created_at')
+    
+    def save_model(self, request, obj, form, change):
+        if 'password' in form.changed_data:
+            obj.password = hash_password(obj.password)
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(Team)
@@ -47,3 +53,38 @@ class WorkoutAdmin(admin.ModelAdmin):
     search_fields = ('name', 'description', 'activity_type')
     readonly_fields = ('_id',)
     fields = ('name', 'description', 'activity_type', 'difficulty', 'duration', 'calories_estimate', 'exercises')
+
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('_id', 'user_email', 'bucket', 'period_start', 'total_calories', 'total_duration', 'activity_count')
+    list_filter = ('bucket', 'period_start')
+    search_fields = ('user_email',)
+    readonly_fields = ('_id', 'updated_at')
+    ordering = ('user_email', 'bucket', 'period_start')
+
+
+@admin.register(TeamStanding)
+class TeamStandingAdmin(admin.ModelAdmin):
+    list_display = ('_id', 'team', 'rank', 'total_calories', 'total_activities', 'total_duration', 'updated_at')
+    search_fields = ('team',)
+    readonly_fields = ('_id', 'updated_at')
+    ordering = ('rank',)
+
+
+@admin.register(LeaderboardSnapshot)
+class LeaderboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('_id', 'kind', 'key', 'team', 'rank', 'total_calories', 'taken_at')
+    list_filter = ('kind', 'taken_at')
+    search_fields = ('key', 'team')
+    readonly_fields = ('_id',)
+    ordering = ('-taken_at', 'kind', 'rank')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('_id', 'name', 'status', 'attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    readonly_fields = ('_id', 'created_at', 'updated_at')
+    ordering = ('run_at',)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class OctofitTrackerConfig(AppConfig):
+    name = 'octofit_tracker'
+
+    def ready(self):
+        from django.conf import settings
+        from . import caching, instrumentation, signals  # noqa: F401
+
+        if settings.INSTRUMENTATION_ENABLED:
+            instrumentation.install()
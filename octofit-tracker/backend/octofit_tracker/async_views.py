@@ -0,0 +1,134 @@
+"""Async read-only mirror of the REST API backed by Motor.
+
+Served under ``/api/async/`` for ASGI deployments: list, retrieve and ``by_*``
+reads go straight to MongoDB through a pooled Motor client instead of holding
+a worker thread on djongo for every in-flight request. Queries, cursors and
+rendering come from the same repositories as the sync viewsets; only the I/O
+differs.
+"""
+import asyncio
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.urls import path
+from rest_framework.settings import api_settings
+
+from .repositories import InvalidCursor, repository_for
+from .serializers import select_fields
+from .views import UserViewSet, TeamViewSet, ActivityViewSet, LeaderboardViewSet, TeamStandingViewSet, WorkoutViewSet
+
+_client = None
+
+
+def get_async_db():
+    """Return the Motor database for the running event loop, reusing its pool."""
+    # Imported lazily so WSGI-only deployments don't need Motor installed.
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop:
+        if _client is not None:
+            _client[1].close()
+        db_settings = connections['default'].settings_dict
+        _client = (loop, AsyncIOMotorClient(**db_settings.get('CLIENT', {}), io_loop=loop))
+    return _client[1][connections['default'].settings_dict['NAME']]
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+class AsyncResource:
+    def __init__(self, prefix, viewset, filters=None):
+        self.prefix = prefix
+        self.viewset = viewset
+        # action name -> (query parameter / field, error message)
+        self.filters = filters or {}
+
+    @property
+    def collection(self):
+        return get_async_db()[self.viewset.queryset.model._meta.db_table]
+
+    def get_repository(self, request):
+        fields = select_fields(self.viewset.serializer_class, request.GET.get('fields'), request.GET.get('exclude'))
+        return repository_for(
+            self.viewset.queryset.model, self.viewset.serializer_class, self.viewset.pagination_class, None, fields,
+        )
+
+    async def page(self, request, filters):
+        try:
+            repository = self.get_repository(request)
+            query, sort, limit, cursor = repository.page_query(request, filters)
+        except ValueError as exc:
+            return render({'error': str(exc)}, status=400)
+        except InvalidCursor:
+            return render({'detail': 'Invalid cursor'}, status=404)
+        documents = await self.collection.find(query, repository.projection, sort=sort, limit=limit).to_list(None)
+        return render(repository.page_envelope(request, documents, cursor, limit - 1))
+
+    async def list(self, request):
+        return await self.page(request, {})
+
+    async def retrieve(self, request, pk):
+        try:
+            object_id = ObjectId(pk)
+        except (InvalidId, TypeError):
+            return render({'detail': 'Not found.'}, status=404)
+        try:
+            repository = self.get_repository(request)
+        except ValueError as exc:
+            return render({'error': str(exc)}, status=400)
+        document = await self.collection.find_one({'_id': object_id}, repository.projection)
+        if document is None:
+            return render({'detail': 'Not found.'}, status=404)
+        return render(repository.serialize([document])[0])
+
+    async def filtered(self, request, action):
+        field, error = self.filters[action]
+        value = request.GET.get(field)
+        if not value:
+            return render({'error': error}, status=400)
+        return await self.page(request, {field: value})
+
+    def urls(self):
+        async def list_view(request):
+            if request.method not in ('GET', 'HEAD'):
+                return HttpResponseNotAllowed(['GET'])
+            return await self.list(request)
+
+        async def detail_view(request, pk):
+            if request.method not in ('GET', 'HEAD'):
+                return HttpResponseNotAllowed(['GET'])
+            return await self.retrieve(request, pk)
+
+        def filter_view(action):
+            async def view(request):
+                if request.method not in ('GET', 'HEAD'):
+                    return HttpResponseNotAllowed(['GET'])
+                return await self.filtered(request, action)
+            return view
+
+        patterns = [path(f'{self.prefix}/', list_view, name=f'async-{self.prefix}-list')]
+        for action in self.filters:
+            patterns.append(path(f'{self.prefix}/{action}/', filter_view(action), name=f'async-{self.prefix}-{action}'))
+        patterns.append(path(f'{self.prefix}/<str:pk>/', detail_view, name=f'async-{self.prefix}-detail'))
+        return patterns
+
+
+RESOURCES = [
+    AsyncResource('users', UserViewSet, {'by_email': ('email', 'Email parameter required')}),
+    AsyncResource('teams', TeamViewSet, {'by_name': ('name', 'Name parameter required')}),
+    AsyncResource('activities', ActivityViewSet, {'by_user': ('user_email', 'User email parameter required')}),
+    AsyncResource('leaderboard', LeaderboardViewSet, {'by_team': ('team', 'Team parameter required')}),
+    AsyncResource('team-standings', TeamStandingViewSet, {'by_team': ('team', 'Team parameter required')}),
+    AsyncResource('workouts', WorkoutViewSet, {
+        'by_difficulty': ('difficulty', 'Difficulty parameter required'),
+        'by_activity_type': ('activity_type', 'Activity type parameter required'),
+    }),
+]
+
+urlpatterns = [pattern for resource in RESOURCES for pattern in resource.urls()]
@@ -0,0 +1,203 @@
+"""Latency and throughput benchmarks for the REST API.
+
+Each scenario is one router endpoint driven by ``concurrency`` client threads,
+either in-process through the Django test client or over HTTP against a
+running server. MongoDB commands per request are read from the
+``Server-Timing`` header added by the instrumentation middleware.
+"""
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import count
+from random import Random
+from urllib.parse import quote
+
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Activity, Team, User
+from .mongo import get_collection
+
+QUERY_COUNT = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def query_count(server_timing):
+    """Read the MongoDB command count from an instrumented ``Server-Timing`` header."""
+    match = QUERY_COUNT.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class Fixtures:
+    """Sample keys from the seeded data for building request paths."""
+
+    def __init__(self, seed=None, sample_size=200):
+        self.rng = Random(seed)
+        self.users = list(get_collection(User).find({}, {'email': 1}).limit(sample_size))
+        self.teams = [team['name'] for team in get_collection(Team).find({}, {'name': 1}).limit(sample_size)]
+        self.activities = [activity['_id'] for activity in get_collection(Activity).find({}, {'_id': 1}).limit(sample_size)]
+        if not (self.users and self.teams and self.activities):
+            raise ValueError('Nothing to benchmark against; seed the database first')
+        self.lock = threading.Lock()
+        self.sequence = count()
+
+    def pick(self, items):
+        with self.lock:
+            return self.rng.choice(items)
+
+    def user(self):
+        return self.pick(self.users)
+
+    def new_activity(self):
+        n = next(self.sequence)
+        return {
+            'user_email': self.user()['email'],
+            'activity_type': 'Running',
+            'duration': 30,
+            'calories': 300,
+            'distance': 5.0,
+            'date': (timezone.now() - timedelta(seconds=n)).isoformat(),
+            'notes': f'benchmark {n}',
+        }
+
+
+# name -> (method, path, body); ``path`` and ``body`` take the Fixtures
+SCENARIOS = {
+    'users-list': ('GET', lambda f: '/api/users/', None),
+    'users-detail': ('GET', lambda f: f'/api/users/{f.user()["_id"]}/', None),
+    'users-by-email': ('GET', lambda f: f'/api/users/by_email/?email={quote(f.user()["email"])}', None),
+    'users-update': ('PATCH', lambda f: f'/api/users/{f.user()["_id"]}/', lambda f: {'name': 'Benchmark User'}),
+    'teams-list': ('GET', lambda f: '/api/teams/', None),
+    'teams-by-name': ('GET', lambda f: f'/api/teams/by_name/?name={quote(f.pick(f.teams))}', None),
+    'activities-list': ('GET', lambda f: '/api/activities/', None),
+    'activities-by-user': ('GET', lambda f: f'/api/activities/by_user/?user_email={quote(f.user()["email"])}', None),
+    'activities-create': ('POST', lambda f: '/api/activities/', lambda f: f.new_activity()),
+    'activities-update': (
+        'PATCH', lambda f: f'/api/activities/{f.pick(f.activities)}/', lambda f: {'notes': 'benchmark update'},
+    ),
+    'leaderboard-list': ('GET', lambda f: '/api/leaderboard/', None),
+    'leaderboard-by-team': ('GET', lambda f: f'/api/leaderboard/by_team/?team={quote(f.pick(f.teams))}', None),
+    'workouts-list': ('GET', lambda f: '/api/workouts/', None),
+    'workouts-by-difficulty': ('GET', lambda f: '/api/workouts/by_difficulty/?difficulty=Hard', None),
+    'workouts-by-activity-type': ('GET', lambda f: '/api/workouts/by_activity_type/?activity_type=Running', None),
+}
+
+
+class InProcessTransport:
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = APIClient(SERVER_NAME='localhost')
+        response = getattr(client, method.lower())(path, body, format='json')
+        return response.status_code, response.get('Server-Timing')
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('Server-Timing')
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers.get('Server-Timing')
+
+    def close(self):
+        pass
+
+
+def percentile(latencies, pct):
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method='inclusive')[pct - 1]
+
+
+def run_scenario(transport, fixtures, scenario, requests, concurrency):
+    method, path, body = SCENARIOS[scenario]
+    latencies, commands = [], []
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    per_worker = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    def worker(n):
+        local_latencies, local_commands, local_errors = [], [], defaultdict(int)
+        try:
+            for _ in range(n):
+                request_path = path(fixtures)
+                request_body = body(fixtures) if body else None
+                started = time.perf_counter()
+                status, server_timing = transport.request(method, request_path, request_body)
+                local_latencies.append(time.perf_counter() - started)
+                queries = query_count(server_timing)
+                if queries is not None:
+                    local_commands.append(queries)
+                if status >= 400:
+                    local_errors[status] += 1
+        finally:
+            transport.close()
+        with lock:
+            latencies.extend(local_latencies)
+            commands.extend(local_commands)
+            for status, hits in local_errors.items():
+                errors[status] += hits
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, [n for n in per_worker if n]))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'method': method,
+        'requests': len(latencies),
+        'errors': {str(status): hits for status, hits in sorted(errors.items())},
+        'requests_per_second': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mongo_commands_per_request': round(statistics.fmean(commands), 2) if commands else None,
+    }
+
+
+def run(scenarios, requests, concurrency, base_url=None, seed=None, warmup=5):
+    """Run ``scenarios`` in order and return ``{scenario: stats}``."""
+    transport = HTTPTransport(base_url) if base_url else InProcessTransport()
+    fixtures = Fixtures(seed)
+
+    results = {}
+    for scenario in scenarios:
+        if warmup:
+            run_scenario(transport, fixtures, scenario, warmup, 1)
+        results[scenario] = run_scenario(transport, fixtures, scenario, requests, concurrency)
+    return results
+
+
+def compare(baseline, current):
+    """Yield ``(scenario, metric, before, after, change %)`` for shared scenarios."""
+    for scenario, stats in current.items():
+        before = baseline.get(scenario)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'requests_per_second', 'mongo_commands_per_request'):
+            old, new = before.get(metric), stats.get(metric)
+            if old and new is not None:
+                yield scenario, metric, old, new, (new - old) / old * 100
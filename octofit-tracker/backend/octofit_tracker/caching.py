@@ -0,0 +1,104 @@
+"""Read-through response cache with ETags for rarely changing list endpoints.
+
+Every cached model has a version number in the cache. Writes bump the
+version, which changes both the ETag and the cache key of every response
+built from that model, so stale entries are never served and simply expire.
+A model can also be versioned per scope (e.g. one user's rows), so a write
+only invalidates the responses of that scope.
+
+Versions live in the ``default`` cache, so every process serving requests
+must share it; with a per-process backend such as ``LocMemCache`` a write in
+one worker leaves the others serving (and 304-confirming) stale responses.
+``manage.py check --deploy`` warns about that.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [checks.Warning(
+        f'The default cache ({backend}) is not shared between processes, so cached API '
+        'responses are not invalidated across workers.',
+        hint='Set OCTOFIT_CACHE_BACKEND to a shared backend (e.g. Redis, Memcached or '
+             'FileBasedCache with a common OCTOFIT_CACHE_LOCATION), or run a single process.',
+        id='octofit_tracker.W001',
+    )]
+
+
+def _version_key(model, scope=None):
+    key = f'octofit:version:{model._meta.db_table}'
+    if scope is not None:
+        key += ':' + hashlib.md5(str(scope).encode()).hexdigest()
+    return key
+
+
+def get_version(model, scope=None):
+    # Seed with the clock so an evicted version never restarts at a value
+    # that older cached responses were stored under.
+    return cache.get_or_set(_version_key(model, scope), time.time_ns(), None)
+
+
+def invalidate(*models, scope=None):
+    for model in models:
+        try:
+            cache.incr(_version_key(model, scope))
+        except ValueError:
+            get_version(model, scope)
+
+
+def cached_response(*models, scope=None, vary=None):
+    """Cache a view action's response data and answer ``If-None-Match`` with 304.
+
+    ``scope(view, request, *args, **kwargs)`` may name the scope the response
+    belongs to; it is then also keyed on the models' versions in that scope.
+    A ``None`` scope skips the cache. ``vary`` takes the same arguments and
+    returns anything else the response depends on, such as the current date.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            versions = [get_version(model) for model in models]
+            if scope is not None:
+                scope_key = scope(self, request, *args, **kwargs)
+                if scope_key is None:
+                    return method(self, request, *args, **kwargs)
+                versions += [get_version(model, scope_key) for model in models]
+            versions = '-'.join(map(str, versions))
+            varies = '' if vary is None else f':{vary(self, request, *args, **kwargs)}'
+            fingerprint = hashlib.md5(
+                f'{request.accepted_renderer.format}:{request.get_full_path()}{varies}'.encode()
+            ).hexdigest()
+            etag = f'"{versions}-{fingerprint}"'
+
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and etag in parse_etags(if_none_match):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+            key = f'octofit:response:{etag}'
+            data = cache.get(key)
+            if data is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
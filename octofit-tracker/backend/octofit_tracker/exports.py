@@ -0,0 +1,104 @@
+"""Streaming NDJSON/CSV exports read straight from a MongoDB cursor.
+
+Rows are pulled in ``batch_size`` chunks and encoded one chunk at a time, so
+memory stays bounded by the batch size however many rows are exported.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from .mongo import get_collection
+from .renderers import to_json
+from .serializers import row_serializer_for, select_fields
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_pages(model, serializer_class, filters=None, sort=None, batch_size=DEFAULT_BATCH_SIZE, fields=None):
+    serializer = row_serializer_for(serializer_class, fields)
+    cursor = get_collection(model).find(
+        filters or {},
+        {column: 1 for column in serializer.source_fields},
+        sort=sort,
+        batch_size=batch_size,
+    )
+    try:
+        while rows := list(islice(cursor, batch_size)):
+            yield serializer.to_representation(rows)
+    finally:
+        cursor.close()
+
+
+def encode_ndjson(pages):
+    for page in pages:
+        yield ''.join(
+            json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=to_json) + '\n' for row in page
+        ).encode()
+
+
+def encode_csv(pages, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for page in pages:
+        writer.writerows(page)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_chunks(model, serializer_class, output='ndjson', compress=False, filters=None, sort=None,
+                  batch_size=DEFAULT_BATCH_SIZE, fields=None):
+    """Yield the encoded export as ``bytes`` chunks."""
+    pages = iter_pages(model, serializer_class, filters, sort, batch_size, fields)
+    if output == 'csv':
+        columns = [name for name, _ in row_serializer_for(serializer_class, fields).fields]
+        chunks = encode_csv(pages, columns)
+    else:
+        chunks = encode_ndjson(pages)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_response(request, model, serializer_class, name, filters=None, sort=None):
+    output = request.query_params.get('output', 'ndjson')
+    if output not in CONTENT_TYPES:
+        return Response({'error': f'output must be one of: {", ".join(CONTENT_TYPES)}'}, status=400)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+    try:
+        fields = select_fields(
+            serializer_class, request.query_params.get('fields'), request.query_params.get('exclude'),
+        )
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=400)
+
+    filename = f'{name}.{output}'
+    content_type = CONTENT_TYPES[output]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(
+        export_chunks(model, serializer_class, output, compress, filters, sort, fields=fields),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
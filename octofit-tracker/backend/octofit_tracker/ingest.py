@@ -0,0 +1,77 @@
+"""Bulk activity ingestion for device sync."""
+from collections import defaultdict
+
+from django.conf import settings
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from . import jobs, leaderboard, rollups
+from .models import Activity
+from .mongo import get_collection
+
+# A device never records two activities of the same type starting at the same
+# instant, so these fields identify a re-sent activity. A unique index on them
+# (``activity_natural_key_uniq``) keeps concurrent syncs from storing it twice.
+NATURAL_KEY = ('user_email', 'date', 'activity_type')
+DUPLICATE_KEY = 11000
+
+
+def _document(data):
+    return {
+        field.column: data.get(field.name, field.get_default())
+        for field in Activity._meta.concrete_fields
+        if not field.primary_key
+    }
+
+
+def insert_activities(activities):
+    """Insert validated activities with one bulk write, skipping ones already stored.
+
+    Returns one entry per activity: the new ``ObjectId``, or ``None`` when an
+    activity with the same natural key already existed.
+    """
+    if not activities:
+        return []
+    requests = []
+    for data in activities:
+        document = _document(data)
+        requests.append(UpdateOne(
+            {key: document[key] for key in NATURAL_KEY},
+            {'$setOnInsert': document},
+            upsert=True,
+        ))
+    try:
+        upserted_ids = get_collection(Activity).bulk_write(requests, ordered=False).upserted_ids
+    except BulkWriteError as exc:
+        # An upsert that lost a race with another sync of the same activity
+        # fails on the unique index; that activity counts as already stored.
+        details = exc.details
+        if details['writeConcernErrors'] or any(
+            error['code'] != DUPLICATE_KEY for error in details['writeErrors']
+        ):
+            raise
+        upserted_ids = {item['index']: item['_id'] for item in details['upserted']}
+
+    ids = [None] * len(activities)
+    totals = defaultdict(lambda: {'calories': 0, 'duration': 0, 'activities': 0})
+    for index, object_id in upserted_ids.items():
+        ids[index] = object_id
+        data = activities[index]
+        user_totals = totals[data['user_email']]
+        user_totals['calories'] += data['calories']
+        user_totals['duration'] += data['duration']
+        user_totals['activities'] += 1
+
+    # Bulk writes bypass the model signals, so feed the leaderboard one
+    # combined delta per user and the rollups one bulk write.
+    if not leaderboard.is_paused():
+        threshold = settings.BULK_RECOMPUTE_THRESHOLD
+        if threshold and len(totals) >= threshold:
+            # Rank shifts for this many users cost more than a rebuild; a
+            # burst of large imports is coalesced into one background run.
+            jobs.enqueue('rebuild_leaderboard', delay=settings.JOB_COALESCE_SECONDS)
+        else:
+            for user_email, user_totals in totals.items():
+                leaderboard.apply_delta(user_email, **user_totals)
+        rollups.apply_activities([activities[index] for index in upserted_ids])
+    return ids
@@ -0,0 +1,262 @@
+"""Per-request MongoDB command counts and timings.
+
+A pymongo command listener adds every command issued while a request is in
+flight (djongo's translated queries and direct collection calls alike) to that
+request's ``RequestStats``. ``InstrumentationMiddleware`` reports them in a
+``Server-Timing`` header, logs requests slower than
+``SLOW_REQUEST_THRESHOLD_MS`` together with their commands, and feeds per-view
+latency histograms served in Prometheus text format by ``metrics_view``,
+together with the MongoDB connection pool counts. Both are kept per process.
+
+The current request's stats live in a context variable, which
+``sync_to_async`` carries over to the thread running a sync view, so the
+middleware works the same under WSGI and ASGI.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from bson import json_util
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+from pymongo import monitoring
+
+from .mongo import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_LOGGED_COMMAND_LENGTH = 1000
+
+_stats = contextvars.ContextVar('octofit_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'commands')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.commands = []
+
+
+def current():
+    """The stats of the request being handled in this context, if any."""
+    return _stats.get()
+
+
+@contextmanager
+def tracking():
+    stats = RequestStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed block as serialization time."""
+    stats = current()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_time += time.perf_counter() - started
+
+
+class CommandListener(monitoring.CommandListener):
+    def started(self, event):
+        stats = current()
+        if stats is not None:
+            stats.queries += 1
+            # Only a reference: the command is formatted if the request turns out slow.
+            stats.commands.append((event.command_name, event.command))
+
+    def succeeded(self, event):
+        stats = current()
+        if stats is not None:
+            stats.db_time += event.duration_micros / 1e6
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+_installed = False
+
+
+def install():
+    """Register the command listener; MongoClients created afterwards report to it."""
+    global _installed
+    if not _installed:
+        monitoring.register(CommandListener())
+        _installed = True
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'total', 'db_total', 'queries')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.db_total = 0.0
+        self.queries = 0
+
+    def observe(self, seconds, stats):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.db_total += stats.db_time
+        self.queries += stats.queries
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(view, method, seconds, stats):
+    with _histograms_lock:
+        histogram = _histograms.get((view, method))
+        if histogram is None:
+            histogram = _histograms[(view, method)] = Histogram()
+        histogram.observe(seconds, stats)
+
+
+def reset_metrics():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def render_metrics():
+    lines = [
+        '# HELP octofit_request_duration_seconds Request latency per view.',
+        '# TYPE octofit_request_duration_seconds histogram',
+    ]
+    db_lines = [
+        '# HELP octofit_request_db_seconds_total Time spent in MongoDB commands per view.',
+        '# TYPE octofit_request_db_seconds_total counter',
+    ]
+    query_lines = [
+        '# HELP octofit_request_queries_total MongoDB commands issued per view.',
+        '# TYPE octofit_request_queries_total counter',
+    ]
+    with _histograms_lock:
+        for (view, method), histogram in sorted(_histograms.items()):
+            labels = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, hits in zip((*LATENCY_BUCKETS, '+Inf'), histogram.buckets):
+                cumulative += hits
+                lines.append(f'octofit_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'octofit_request_duration_seconds_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'octofit_request_duration_seconds_count{{{labels}}} {histogram.count}')
+            db_lines.append(f'octofit_request_db_seconds_total{{{labels}}} {histogram.db_total:.6f}')
+            query_lines.append(f'octofit_request_queries_total{{{labels}}} {histogram.queries}')
+    return '\n'.join(lines + db_lines + query_lines + render_pool_metrics()) + '\n'
+
+
+POOL_METRICS = (
+    ('open', 'gauge', 'Open connections in the MongoDB pool.'),
+    ('checked_out', 'gauge', 'MongoDB connections currently checked out.'),
+    ('waiting', 'gauge', 'Threads waiting for a MongoDB connection.'),
+    ('created', 'counter', 'MongoDB connections created.'),
+    ('closed', 'counter', 'MongoDB connections closed.'),
+    ('check_out_failed', 'counter', 'Failed MongoDB connection check-outs, e.g. wait queue timeouts.'),
+    ('cleared', 'counter', 'MongoDB pool clears after network errors.'),
+)
+
+
+def render_pool_metrics():
+    stats = pool_stats.snapshot()
+    lines = []
+    for field, kind, description in POOL_METRICS:
+        name = f'octofit_mongo_pool_{field}' + ('_total' if kind == 'counter' else '')
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for address, counts in sorted(stats.items()):
+            lines.append(f'{name}{{address="{address}"}} {counts.get(field, 0)}')
+    return lines
+
+
+def metrics_view(request):
+    if not settings.INSTRUMENTATION_ENABLED:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4')
+
+
+def format_command(name, command):
+    text = json_util.dumps(command)
+    if len(text) > MAX_LOGGED_COMMAND_LENGTH:
+        text = text[:MAX_LOGGED_COMMAND_LENGTH] + '...'
+    return f'{name} {text}'
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as a coroutine function, so Django awaits it
+            # instead of adapting it with sync_to_async.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with tracking() as stats:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            elapsed = time.perf_counter() - started
+        return self.finish(request, response, stats, elapsed)
+
+    async def __acall__(self, request):
+        with tracking() as stats:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            elapsed = time.perf_counter() - started
+        return self.finish(request, response, stats, elapsed)
+
+    def finish(self, request, response, stats, elapsed):
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+            f'serialize;dur={stats.serialize_time * 1000:.2f}, '
+            f'total;dur={elapsed * 1000:.2f}'
+        )
+        match = request.resolver_match
+        observe(match.view_name if match else 'unresolved', request.method, elapsed, stats)
+
+        if elapsed * 1000 > settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                'Slow request %s %s -> %s in %.1fms (db %.1fms, %d queries)%s',
+                request.method, request.get_full_path(), response.status_code, elapsed * 1000,
+                stats.db_time * 1000, stats.queries,
+                ''.join(f'\n  {format_command(name, command)}' for name, command in stats.commands),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; count that as serialization.
+        stats = current()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.serialize_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,208 @@
+"""Background jobs queued in MongoDB and run by ``manage.py run_jobs``.
+
+``enqueue`` upserts on the job's key (its name and arguments), so while a job
+is pending every identical request is absorbed by it. Giving a ``delay``
+coalesces a burst of triggers into one run at most ``delay`` seconds after
+the first; a unique partial index on ``key`` keeps concurrent enqueues from
+creating two pending jobs. Workers claim due jobs with ``find_one_and_update``
+under a lease that a heartbeat renews while the job runs, so a job whose
+worker died is picked up again once the lease expires. Failed
+jobs are retried with exponential backoff up to ``max_attempts`` and then
+kept with ``status='failed'``; successful ones are deleted.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from . import leaderboard, rollups
+from .models import Job
+from .mongo import get_collection
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, FAILED = 'pending', 'running', 'failed'
+
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the job ``name``."""
+    def decorator(function):
+        TASKS[name] = function
+        return function
+    return decorator
+
+
+@task('rebuild_leaderboard')
+def rebuild_leaderboard():
+    leaderboard.rebuild()
+
+
+@task('rebuild_rollups')
+def rebuild_rollups(user_email=None):
+    rollups.rebuild(user_email)
+
+
+@task('snapshot_leaderboard')
+def snapshot_leaderboard(keep_days=None):
+    call_command('snapshot_leaderboard', keep_days=keep_days)
+
+
+@task('ensure_indexes')
+def ensure_indexes():
+    call_command('ensure_indexes')
+
+
+@task('populate_db')
+def populate_db(**options):
+    call_command('populate_db', **options)
+
+
+def job_key(name, kwargs):
+    return f'{name}:{json.dumps(kwargs, sort_keys=True, default=str)}'
+
+
+def enqueue(name, delay=0, max_attempts=None, **kwargs):
+    """Schedule the job ``name`` and return its ``_id``.
+
+    A pending job with the same name and arguments is reused instead, keeping
+    its original run time.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown job: {name}')
+    now = timezone.now()
+    key = job_key(name, kwargs)
+    while True:
+        try:
+            job = get_collection(Job).find_one_and_update(
+                {'key': key, 'status': PENDING},
+                {'$setOnInsert': {
+                    'name': name,
+                    'kwargs': kwargs,
+                    'key': key,
+                    'status': PENDING,
+                    'attempts': 0,
+                    'max_attempts': max_attempts or settings.JOB_MAX_ATTEMPTS,
+                    'run_at': now + timedelta(seconds=delay),
+                    'locked_until': None,
+                    'last_error': '',
+                    'created_at': now,
+                    'updated_at': now,
+                }},
+                projection={'_id': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Another enqueue inserted the same job first; the retry finds it
+            continue
+        return job['_id']
+
+
+def claim(lease=None):
+    """Lock the next due job for this worker and return it, or ``None``."""
+    now = timezone.now()
+    lease = settings.JOB_LEASE_SECONDS if lease is None else lease
+    return get_collection(Job).find_one_and_update(
+        {'$or': [
+            {'status': PENDING, 'run_at': {'$lte': now}},
+            # Its worker died or hung past the lease
+            {'status': RUNNING, 'locked_until': {'$lt': now}},
+        ]},
+        {
+            '$set': {'status': RUNNING, 'locked_until': now + timedelta(seconds=lease), 'updated_at': now},
+            '$inc': {'attempts': 1},
+        },
+        sort=[('run_at', 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+@contextmanager
+def heartbeat(claimed, lease):
+    """Renew the lease on the ``claimed`` job every third of ``lease`` until the block exits."""
+    collection = get_collection(Job)
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(lease / 3):
+            try:
+                collection.update_one(
+                    {**claimed, 'status': RUNNING},
+                    {'$set': {'locked_until': timezone.now() + timedelta(seconds=lease)}},
+                )
+            except PyMongoError as exc:
+                logger.warning('Could not renew the lease on job %s: %s', claimed['_id'], exc)
+
+    thread = threading.Thread(target=renew, name=f'job-heartbeat-{claimed["_id"]}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run(job, lease=None):
+    """Run a claimed job and record the outcome; returns whether it succeeded."""
+    collection = get_collection(Job)
+    lease = settings.JOB_LEASE_SECONDS if lease is None else lease
+    # Matching on attempts ignores a worker whose lease was taken over
+    claimed = {'_id': job['_id'], 'attempts': job['attempts']}
+    try:
+        with heartbeat(claimed, lease):
+            TASKS[job['name']](**job['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job['attempts'] >= job['max_attempts'] or job['name'] not in TASKS:
+            logger.error('Job %s %s failed for good after %d attempts', job['name'], job['kwargs'], job['attempts'])
+            update = {'status': FAILED}
+        else:
+            delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job['attempts'] - 1)
+            logger.warning('Job %s %s failed, retrying in %ds', job['name'], job['kwargs'], delay)
+            update = {'status': PENDING, 'run_at': now + timedelta(seconds=delay)}
+        try:
+            collection.update_one(claimed, {'$set': {
+                **update, 'locked_until': None, 'last_error': error, 'updated_at': now,
+            }})
+        except DuplicateKeyError:
+            # The same job was enqueued while this one ran; that pending job is the retry
+            collection.delete_one(claimed)
+        return False
+    collection.delete_one(claimed)
+    return True
+
+
+def work(burst=False, poll_interval=1.0, max_jobs=None, lease=None):
+    """Run due jobs one at a time; returns the number of jobs run.
+
+    Stops after ``max_jobs`` jobs or, with ``burst``, as soon as none is due;
+    otherwise polls every ``poll_interval`` seconds.
+    """
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim(lease)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        started = time.perf_counter()
+        succeeded = run(job, lease)
+        ran += 1
+        logger.info(
+            'Job %s %s %s in %.1fs', job['name'], job['kwargs'],
+            'done' if succeeded else 'failed', time.perf_counter() - started,
+        )
+    return ran
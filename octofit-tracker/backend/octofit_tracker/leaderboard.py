@@ -0,0 +1,403 @@
+"""Incremental leaderboard and team standings maintenance.
+
+Rows are ranked by ``total_calories`` (highest first) with ranks 1..n and no
+gaps. When a user's totals change only the rows between the user's old and
+new position are shifted, so a write never re-sorts the whole board; the
+same delta is applied to the user's row in the team standings. Rank
+changes on a board are serialized by a lock document, so concurrent writers
+never read a rank another writer is about to shift; a rebuild holds the same
+lock, so incremental writers wait for it instead of being overwritten.
+
+``snapshot`` copies both boards into the append-only snapshot collection, so
+rank changes over time are a single indexed lookup.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from bson import ObjectId
+from django.utils import timezone
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from . import caching
+from .models import Activity, Leaderboard, LeaderboardSnapshot, TeamStanding, User
+from .mongo import get_collection, get_db
+
+_state = threading.local()
+
+LOCKS_COLLECTION = 'leaderboard_locks'
+# A writer that dies holding a board lock blocks the board for at most this long
+LOCK_TIMEOUT = timedelta(seconds=10)
+LOCK_RETRY_INTERVAL = 0.005
+LOCK_MAX_RETRY_INTERVAL = 0.25
+
+
+def is_paused():
+    return getattr(_state, 'paused', False)
+
+
+@contextmanager
+def paused():
+    """Skip incremental leaderboard and rollup updates, e.g. while a command rebuilds them."""
+    previous = is_paused()
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = previous
+
+
+@contextmanager
+def _locked(collection, renew=False):
+    """Hold the lock on the board stored in ``collection`` across threads and processes.
+
+    With ``renew`` the lock is extended in the background so it can be held
+    longer than ``LOCK_TIMEOUT``, e.g. for a rebuild.
+    """
+    locks = get_db()[LOCKS_COLLECTION]
+    token = ObjectId()
+    delay = LOCK_RETRY_INTERVAL
+    while True:
+        now = timezone.now()
+        try:
+            # Only a free or expired lock matches; otherwise the upsert hits the _id
+            locks.update_one(
+                {'_id': collection.name, 'locked_until': {'$lt': now}},
+                {'$set': {'token': token, 'locked_until': now + LOCK_TIMEOUT}},
+                upsert=True,
+            )
+            break
+        except DuplicateKeyError:
+            time.sleep(delay)
+            delay = min(delay * 2, LOCK_MAX_RETRY_INTERVAL)
+
+    stop = threading.Event()
+
+    def keep():
+        while not stop.wait(LOCK_TIMEOUT.total_seconds() / 3):
+            locks.update_one(
+                {'_id': collection.name, 'token': token},
+                {'$set': {'locked_until': timezone.now() + LOCK_TIMEOUT}},
+            )
+
+    renewer = threading.Thread(target=keep, name=f'lock-{collection.name}', daemon=True) if renew else None
+    if renewer:
+        renewer.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        if renewer:
+            renewer.join()
+        locks.delete_one({'_id': collection.name, 'token': token})
+
+
+def _new_row(collection, user_email):
+    user = User.objects.filter(email=user_email).values('team').first()
+    row = {
+        'user_email': user_email,
+        'team': (user or {}).get('team') or '',
+        'total_calories': 0,
+        'total_activities': 0,
+        'total_duration': 0,
+        'rank': collection.count_documents({}) + 1,
+        'updated_at': timezone.now(),
+    }
+    row['_id'] = collection.insert_one(row).inserted_id
+    return row
+
+
+def _nearest(collection, others, op, calories):
+    """Return the row closest to ``calories`` on the ``op`` side, breaking ties by rank.
+
+    Two lookups keep both served by the ascending ``(total_calories, rank)``
+    index regardless of direction.
+    """
+    direction = -1 if op == '$lt' else 1
+    nearest = collection.find_one(
+        {**others, 'total_calories': {op: calories}},
+        {'total_calories': 1},
+        sort=[('total_calories', direction)],
+    )
+    if nearest is None:
+        return None
+    return collection.find_one(
+        {**others, 'total_calories': nearest['total_calories']},
+        {'rank': 1},
+        sort=[('rank', -direction)],
+    )
+
+
+def _apply(collection, row, calories, duration, activities):
+    """Add the deltas to ``row`` and move it to its new rank within ``collection``."""
+    old_rank = row['rank']
+    new_calories = row['total_calories'] + calories
+    others = {'_id': {'$ne': row['_id']}}
+    new_rank = old_rank
+
+    if calories > 0:
+        # First row this one now beats: every row from there up to the old
+        # position drops one place.
+        passed = _nearest(collection, others, '$lt', new_calories)
+        if passed is not None and passed['rank'] < old_rank:
+            new_rank = passed['rank']
+            collection.update_many(
+                {**others, 'rank': {'$gte': new_rank, '$lt': old_rank}},
+                {'$inc': {'rank': 1}},
+            )
+    elif calories < 0:
+        # Last row that now beats this one: every row down to it moves up.
+        passing = _nearest(collection, others, '$gt', new_calories)
+        if passing is not None and passing['rank'] > old_rank:
+            new_rank = passing['rank']
+            collection.update_many(
+                {**others, 'rank': {'$gt': old_rank, '$lte': new_rank}},
+                {'$inc': {'rank': -1}},
+            )
+
+    collection.update_one(
+        {'_id': row['_id']},
+        {
+            '$inc': {
+                'total_calories': calories,
+                'total_duration': duration,
+                'total_activities': activities,
+            },
+            '$set': {'rank': new_rank, 'updated_at': timezone.now()},
+        },
+    )
+
+
+def apply_delta(user_email, calories=0, duration=0, activities=0):
+    """Add the given deltas to a user's totals and their team's, moving both rows to their new rank."""
+    if not (calories or duration or activities):
+        return
+    collection = get_collection(Leaderboard)
+    with _locked(collection):
+        row = collection.find_one({'user_email': user_email})
+        if row is None:
+            row = _new_row(collection, user_email)
+        _apply(collection, row, calories, duration, activities)
+    if row['team']:
+        apply_team_delta(row['team'], calories, duration, activities)
+    caching.invalidate(Leaderboard, TeamStanding)
+
+
+def apply_team_delta(team, calories=0, duration=0, activities=0):
+    if not (calories or duration or activities):
+        return
+    collection = get_collection(TeamStanding)
+    with _locked(collection):
+        row = collection.find_one({'team': team})
+        if row is None:
+            row = {
+                'team': team,
+                'total_calories': 0,
+                'total_activities': 0,
+                'total_duration': 0,
+                'rank': collection.count_documents({}) + 1,
+                'updated_at': timezone.now(),
+            }
+            row['_id'] = collection.insert_one(row).inserted_id
+        _apply(collection, row, calories, duration, activities)
+
+
+def change_team(user_email, team):
+    """Move a user's leaderboard row, and its totals in the team standings, to ``team``."""
+    collection = get_collection(Leaderboard)
+    with _locked(collection):
+        row = collection.find_one_and_update(
+            {'user_email': user_email},
+            {'$set': {'team': team or ''}},
+            {'team': 1, 'total_calories': 1, 'total_duration': 1, 'total_activities': 1},
+        )
+        if row is not None and (row.get('team') or '') != (team or ''):
+            totals = (row['total_calories'], row['total_duration'], row['total_activities'])
+            if row.get('team'):
+                apply_team_delta(row['team'], *(-total for total in totals))
+            if team:
+                apply_team_delta(team, *totals)
+    caching.invalidate(Leaderboard, TeamStanding)
+
+
+def top(k, team=None, projection=None):
+    """The ``k`` best rows, globally or within ``team``; reads ``k`` index entries."""
+    query = {'team': team} if team else {}
+    return list(get_collection(Leaderboard).find(query, projection, sort=[('rank', 1)], limit=k))
+
+
+def around(row, n, team=None, projection=None):
+    """Up to ``n`` rows either side of ``row``, globally or within ``team``, in rank order."""
+    collection = get_collection(Leaderboard)
+    query = {'team': team} if team else {}
+    above = collection.find({**query, 'rank': {'$lt': row['rank']}}, projection, sort=[('rank', -1)], limit=n)
+    below = collection.find({**query, 'rank': {'$gt': row['rank']}}, projection, sort=[('rank', 1)], limit=n)
+    return [*reversed(list(above)), row, *below]
+
+
+def record_activity(activity, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) one activity from its user's totals."""
+    apply_delta(
+        activity['user_email'],
+        calories=sign * activity['calories'],
+        duration=sign * activity['duration'],
+        activities=sign,
+    )
+
+
+def _rebuild_pipeline():
+    users = get_collection(User).name
+    return [
+        {'$group': {
+            '_id': '$user_email',
+            'total_calories': {'$sum': '$calories'},
+            'total_duration': {'$sum': '$duration'},
+            'total_activities': {'$sum': 1},
+        }},
+        # Users without any activity still get a (zero) row on the board.
+        {'$unionWith': {'coll': users, 'pipeline': [
+            {'$project': {'_id': '$email', 'team': 1}},
+        ]}},
+        {'$group': {
+            '_id': '$_id',
+            'team': {'$max': '$team'},
+            'total_calories': {'$sum': '$total_calories'},
+            'total_duration': {'$sum': '$total_duration'},
+            'total_activities': {'$sum': '$total_activities'},
+        }},
+        {'$setWindowFields': {
+            'sortBy': {'total_calories': -1, '_id': 1},
+            'output': {'rank': {'$documentNumber': {}}},
+        }},
+    ]
+
+
+def _replace_rows(collection, key, rows, started, batch_size):
+    """Upsert ``rows`` by ``key`` in batches, then drop rows not rewritten since ``started``.
+
+    Callers hold the board lock. Returns the number of rows written.
+    """
+    written = 0
+    requests = []
+    for row in rows:
+        requests.append(ReplaceOne({key: row[key]}, {**row, 'updated_at': started}, upsert=True))
+        if len(requests) >= batch_size:
+            collection.bulk_write(requests, ordered=False)
+            written += len(requests)
+            requests = []
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+        written += len(requests)
+    collection.delete_many({'updated_at': {'$lt': started}})
+    return written
+
+
+def rebuild(batch_size=1000):
+    """Recompute every row from the activities collection in one aggregation.
+
+    Rows are replaced in batches of ``batch_size`` and stale ones removed
+    afterwards. Both boards stay locked throughout, so ``apply_delta`` waits
+    and then applies its delta on top of the rebuilt rows. Returns the number
+    of leaderboard rows written.
+    """
+    collection = get_collection(Leaderboard)
+    with _locked(collection, renew=True):
+        started = timezone.now()
+        rows = (
+            {
+                'user_email': row['_id'],
+                'team': row.get('team') or '',
+                'total_calories': row['total_calories'],
+                'total_activities': row['total_activities'],
+                'total_duration': row['total_duration'],
+                'rank': row['rank'],
+            }
+            for row in get_collection(Activity).aggregate(_rebuild_pipeline(), allowDiskUse=True)
+        )
+        written = _replace_rows(collection, 'user_email', rows, started, batch_size)
+        # Still under the leaderboard lock (taken before the team lock, as
+        # apply_delta does), so the standings are summed from settled rows
+        rebuild_teams(batch_size)
+    caching.invalidate(Leaderboard, TeamStanding)
+    return written
+
+
+def rebuild_teams(batch_size=1000):
+    """Recompute the team standings from the user leaderboard; returns the number of teams."""
+    collection = get_collection(TeamStanding)
+    with _locked(collection, renew=True):
+        started = timezone.now()
+        rows = (
+            {
+                'team': row['_id'],
+                'total_calories': row['total_calories'],
+                'total_activities': row['total_activities'],
+                'total_duration': row['total_duration'],
+                'rank': row['rank'],
+            }
+            for row in get_collection(Leaderboard).aggregate([
+                {'$match': {'team': {'$nin': ['', None]}}},
+                {'$group': {
+                    '_id': '$team',
+                    'total_calories': {'$sum': '$total_calories'},
+                    'total_duration': {'$sum': '$total_duration'},
+                    'total_activities': {'$sum': '$total_activities'},
+                }},
+                {'$setWindowFields': {
+                    'sortBy': {'total_calories': -1, '_id': 1},
+                    'output': {'rank': {'$documentNumber': {}}},
+                }},
+            ], allowDiskUse=True)
+        )
+        return _replace_rows(collection, 'team', rows, started, batch_size)
+
+
+SNAPSHOT_SOURCES = (
+    ('user', Leaderboard, '$user_email'),
+    ('team', TeamStanding, '$team'),
+)
+
+
+def snapshot(taken_at=None):
+    """Append the current user and team boards to the snapshot collection.
+
+    Rows are copied server-side with ``$merge``. Returns ``taken_at``.
+    """
+    taken_at = taken_at or timezone.now()
+    snapshots = get_collection(LeaderboardSnapshot).name
+    for kind, model, key in SNAPSHOT_SOURCES:
+        get_collection(model).aggregate([
+            {'$project': {
+                '_id': 0,
+                'kind': {'$literal': kind},
+                'key': key,
+                'team': {'$ifNull': ['$team', '']},
+                'total_calories': 1,
+                'total_activities': 1,
+                'total_duration': 1,
+                'rank': 1,
+                'taken_at': {'$literal': taken_at},
+            }},
+            {'$merge': {'into': snapshots, 'whenMatched': 'fail', 'whenNotMatched': 'insert'}},
+        ])
+    return taken_at
+
+
+def rank_change(kind, key, rank, since):
+    """Compare ``rank`` with the latest snapshot of ``key`` taken at or before ``since``."""
+    previous = get_collection(LeaderboardSnapshot).find_one(
+        {'kind': kind, 'key': key, 'taken_at': {'$lte': since}},
+        {'rank': 1, 'taken_at': 1},
+        sort=[('taken_at', -1)],
+    )
+    if previous is None:
+        return {'rank': rank, 'previous_rank': None, 'change': None, 'snapshot_taken_at': None}
+    return {
+        'rank': rank,
+        'previous_rank': previous['rank'],
+        # Positive when the row moved up the board
+        'change': previous['rank'] - rank,
+        'snapshot_taken_at': previous['taken_at'],
+    }
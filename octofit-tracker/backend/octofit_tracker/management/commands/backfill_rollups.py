@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from octofit_tracker import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily/weekly/monthly activity rollups from the activity history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-email', help='Only rebuild this user\'s rollups')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Backfilling activity rollups...')
+        started = time.monotonic()
+        rows = rollups.rebuild(options['user_email'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} rollup rows in {elapsed:.2f}s'))
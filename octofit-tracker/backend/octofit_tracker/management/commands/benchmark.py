@@ -0,0 +1,101 @@
+import json
+import os
+import platform
+import subprocess
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from octofit_tracker import benchmark
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, throughput and MongoDB commands per request for every API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-users', type=int, default=None,
+            help='First replace ALL existing data with this many synthetic users via populate_db '
+                 '(default: benchmark the data already in the database)',
+        )
+        parser.add_argument('--teams', type=int, default=10, help='Synthetic teams when seeding')
+        parser.add_argument('--activities-per-user', type=int, default=5, help='Activities per user when seeding')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the data and request mix')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint before measuring')
+        parser.add_argument(
+            '--endpoint', action='append', choices=benchmark.SCENARIOS, dest='endpoints',
+            help='Only run this endpoint; may be repeated',
+        )
+        parser.add_argument(
+            '--url', help='Benchmark a running server at this base URL instead of in-process',
+        )
+        parser.add_argument('--output', help='Write results as JSON here (default: benchmarks/<commit>.json)')
+        parser.add_argument('--compare', help='Print changes against an earlier results file')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+
+        if options['seed_users'] is not None:
+            self.stdout.write(f'Seeding {options["seed_users"]} users...')
+            call_command(
+                'populate_db', users=options['seed_users'], teams=options['teams'],
+                activities_per_user=options['activities_per_user'], seed=options['seed'],
+                stdout=StringIO(),
+            )
+
+        scenarios = options['endpoints'] or list(benchmark.SCENARIOS)
+        try:
+            results = benchmark.run(
+                scenarios, options['requests'], options['concurrency'], base_url=options['url'],
+                seed=options['seed'], warmup=options['warmup'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f'{"endpoint":<28}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"mongo":>8}  errors')
+        for scenario, stats in results.items():
+            mongo = stats['mongo_commands_per_request']
+            self.stdout.write(
+                f'{scenario:<28}{stats["requests_per_second"]:>10}{stats["p50_ms"]:>10}{stats["p95_ms"]:>10}'
+                f'{stats["p99_ms"]:>10}{"-" if mongo is None else mongo:>8}  {stats["errors"] or ""}'
+            )
+
+        commit = current_commit()
+        output = options['output'] or os.path.join('benchmarks', f'{commit}.json')
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w') as stream:
+            json.dump({
+                'commit': commit,
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'mode': options['url'] or 'in-process',
+                'scale': {
+                    'users': options['seed_users'],
+                    'teams': options['teams'],
+                    'activities_per_user': options['activities_per_user'],
+                },
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'endpoints': results,
+            }, stream, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['compare']:
+            with open(options['compare']) as stream:
+                baseline = json.load(stream)
+            self.stdout.write(f'Compared with {baseline.get("commit", options["compare"])}:')
+            for scenario, metric, before, after, change in benchmark.compare(baseline['endpoints'], results):
+                self.stdout.write(f'  {scenario:<28}{metric:<28}{before:>10} -> {after:<10} ({change:+.1f}%)')
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from octofit_tracker import jobs
+
+
+def argument(value):
+    name, separator, raw = value.partition('=')
+    if not separator:
+        raise ValueError(value)
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+class Command(BaseCommand):
+    help = 'Queue a background job for run_jobs; an identical pending job is reused'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(jobs.TASKS))
+        parser.add_argument(
+            '--arg', action='append', type=argument, default=[], dest='arguments', metavar='NAME=VALUE',
+            help='Keyword argument for the job; VALUE is parsed as JSON when possible',
+        )
+        parser.add_argument('--delay', type=int, default=0, help='Run no earlier than this many seconds from now')
+        parser.add_argument('--max-attempts', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            job_id = jobs.enqueue(
+                options['name'], options['delay'], options['max_attempts'], **dict(options['arguments']),
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f'Queued {options["name"]} as {job_id}'))
@@ -0,0 +1,72 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from octofit_tracker.mongo import get_db
+
+
+def index_keys(model, index):
+    """Translate a Django ``Index`` or ``UniqueConstraint`` into a pymongo key specification."""
+    keys = []
+    for field_name in index.fields:
+        direction = -1 if field_name.startswith('-') else 1
+        column = model._meta.get_field(field_name.lstrip('-')).column
+        keys.append((column, direction))
+    return keys
+
+
+def partial_filter(model, constraint):
+    """Translate a constraint's ``condition`` of plain equalities into a ``partialFilterExpression``."""
+    return {
+        model._meta.get_field(field_name).column: value
+        for field_name, value in constraint.condition.children
+    }
+
+
+class Command(BaseCommand):
+    help = 'Create or verify the MongoDB indexes declared in the models\' Meta.indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report missing indexes instead of creating them',
+        )
+
+    def handle(self, *args, **options):
+        db = get_db()
+        missing = 0
+
+        for model in apps.get_app_config('octofit_tracker').get_models():
+            collection = db[model._meta.db_table]
+            existing = {
+                tuple(map(tuple, info['key'])): name
+                for name, info in collection.index_information().items()
+            }
+
+            unique = [
+                constraint for constraint in model._meta.constraints
+                if isinstance(constraint, models.UniqueConstraint)
+            ]
+            for index in [*model._meta.indexes, *unique]:
+                keys = index_keys(model, index)
+                if tuple(keys) in existing:
+                    self.stdout.write(f'{collection.name}: {index.name} present')
+                elif options['check']:
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f'{collection.name}: {index.name} missing {keys}'))
+                else:
+                    extra = {}
+                    if getattr(index, 'condition', None) is not None:
+                        extra['partialFilterExpression'] = partial_filter(model, index)
+                    collection.create_index(keys, name=index.name, unique=index in unique, **extra)
+                    self.stdout.write(self.style.SUCCESS(f'{collection.name}: created {index.name}'))
+
+            for stats in collection.aggregate([{'$indexStats': {}}]):
+                if stats['name'] != '_id_' and stats['accesses']['ops'] == 0:
+                    self.stdout.write(self.style.WARNING(
+                        f'{collection.name}: {stats["name"]} unused since {stats["accesses"]["since"]:%Y-%m-%d %H:%M}'
+                    ))
+
+        if missing:
+            raise CommandError(f'{missing} index(es) missing; run without --check to create them')
+        self.stdout.write(self.style.SUCCESS('Indexes verified'))
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from octofit_tracker.exports import CONTENT_TYPES, DEFAULT_BATCH_SIZE, export_chunks
+from octofit_tracker.models import Activity, Leaderboard
+from octofit_tracker.serializers import ActivitySerializer, LeaderboardSerializer
+
+
+EXPORTS = {
+    'activities': (Activity, ActivitySerializer),
+    'leaderboard': (Leaderboard, LeaderboardSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream activities or the leaderboard as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection', choices=EXPORTS)
+        parser.add_argument('--output', choices=CONTENT_TYPES, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the export')
+        parser.add_argument('--user-email', help='Only export this user\'s activities')
+        parser.add_argument('--team', help='Only export this team\'s leaderboard rows')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--file', help='Write to this path instead of stdout')
+
+    def handle(self, *args, **options):
+        model, serializer_class = EXPORTS[options['collection']]
+        filters, sort = {}, None
+        if options['collection'] == 'activities' and options['user_email']:
+            filters, sort = {'user_email': options['user_email']}, [('date', 1)]
+        elif options['collection'] == 'leaderboard':
+            sort = [('rank', 1)]
+            if options['team']:
+                filters = {'team': options['team']}
+
+        chunks = export_chunks(
+            model, serializer_class, options['output'], options['gzip'], filters, sort, options['batch_size'],
+        )
+        if options['file']:
+            with open(options['file'], 'wb') as stream:
+                for chunk in chunks:
+                    stream.write(chunk)
+            self.stdout.write(self.style.SUCCESS(f'Exported {options["collection"]} to {options["file"]}'))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
@@ -0,0 +1,121 @@
+import csv
+import json
+import sys
+from collections import defaultdict
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from pymongo import UpdateOne
+from octofit_tracker.credentials import hash_passwords, hasher_pool
+from octofit_tracker.models import Team, User
+from octofit_tracker.mongo import get_collection
+
+FIELDS = ('name', 'email', 'password', 'team')
+
+
+def read_rows(stream, input_format):
+    if input_format == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV or NDJSON file (name, email, password, team), hashing passwords in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the file, or - for stdin')
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'), default=None,
+            help='Input format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processes used to hash passwords (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=None,
+            help='PBKDF2 iterations for the imported passwords (default: PASSWORD_HASH_ITERATIONS); '
+                 'lower values are upgraded on first login',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Users hashed and written per bulk_write call',
+        )
+
+    def handle(self, *args, **options):
+        input_format = options['format']
+        if input_format is None:
+            input_format = 'csv' if options['file'].endswith('.csv') else 'ndjson'
+
+        try:
+            stream = sys.stdin if options['file'] == '-' else open(options['file'], newline='')
+        except OSError as exc:
+            raise CommandError(f'Could not open {options["file"]}: {exc}')
+        try:
+            rows = read_rows(stream, input_format)
+            with hasher_pool(options['workers']) as pool:
+                totals = defaultdict(int)
+                while batch := list(islice(rows, options['batch_size'])):
+                    for key, value in self.import_batch(batch, pool, options).items():
+                        totals[key] += value
+                    self.stdout.write(f'{totals["created"]} users imported...')
+        except (ValueError, csv.Error) as exc:
+            raise CommandError(f'Could not read {options["file"]}: {exc}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {totals["created"]} users; skipped {totals["existing"]} existing '
+            f'and {totals["invalid"]} invalid rows'
+        ))
+
+    def import_batch(self, rows, pool, options):
+        users, invalid = {}, 0
+        for row in rows:
+            user = {field: (row.get(field) or '').strip() for field in FIELDS}
+            if not (user['name'] and user['email'] and user['password']):
+                invalid += 1
+                continue
+            users[user['email']] = user
+
+        collection = get_collection(User)
+        existing = {
+            user['email'] for user in collection.find({'email': {'$in': list(users)}}, {'email': 1})
+        }
+        new_users = [user for email, user in users.items() if email not in existing]
+        passwords = hash_passwords(
+            (user['password'] for user in new_users), options['workers'], options['iterations'], pool,
+        )
+
+        created = []
+        if new_users:
+            now = timezone.now()
+            # $setOnInsert leaves a user who signed up meanwhile untouched
+            result = collection.bulk_write([
+                UpdateOne({'email': user['email']}, {'$setOnInsert': {
+                    'name': user['name'], 'password': password, 'team': user['team'], 'created_at': now,
+                }}, upsert=True)
+                for user, password in zip(new_users, passwords)
+            ], ordered=False)
+            created = [new_users[index] for index in result.upserted_ids]
+
+        members = defaultdict(list)
+        for user in created:
+            if user['team']:
+                members[user['team']].append(user['email'])
+        if members:
+            get_collection(Team).bulk_write([
+                UpdateOne({'name': team}, {'$addToSet': {'members': {'$each': emails}}})
+                for team, emails in members.items()
+            ], ordered=False)
+
+        return {
+            'created': len(created),
+            'existing': len(users) - len(created),
+            'invalid': invalid,
+        }
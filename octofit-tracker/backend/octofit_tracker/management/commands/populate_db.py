@@ -1,291 +1,427 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import timedelta
-from octofit_tracker.models import User, Team, Activity, Leaderboard, Workout
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from octofit_tracker import caching, leaderboard, rollups
+from octofit_tracker.credentials import hash_passwords
+from octofit_tracker.ingest import DUPLICATE_KEY, insert_activities
+from octofit_tracker.models import User, Team, Activity, ActivityRollup, Leaderboard, Workout
+from octofit_tracker.mongo import get_collection
+
+
+HERO_TEAMS = [
+    {'name': 'Team Marvel', 'description': 'Earth\'s Mightiest Heroes fighting for fitness'},
+    {'name': 'Team DC', 'description': 'Justice League champions of wellness'},
+]
+
+HERO_USERS = [
+    {'name': 'Tony Stark', 'email': 'ironman@marvel.com', 'password': 'arc_reactor_3000', 'team': 'Team Marvel'},
+    {'name': 'Steve Rogers', 'email': 'captain@marvel.com', 'password': 'shield_throw_99', 'team': 'Team Marvel'},
+    {'name': 'Natasha Romanoff', 'email': 'blackwidow@marvel.com', 'password': 'red_in_ledger', 'team': 'Team Marvel'},
+    {'name': 'Bruce Banner', 'email': 'hulk@marvel.com', 'password': 'angry_science', 'team': 'Team Marvel'},
+    {'name': 'Thor Odinson', 'email': 'thor@marvel.com', 'password': 'worthiness_check', 'team': 'Team Marvel'},
+    {'name': 'Clark Kent', 'email': 'superman@dc.com', 'password': 'kryptonite_fear', 'team': 'Team DC'},
+    {'name': 'Bruce Wayne', 'email': 'batman@dc.com', 'password': 'im_batman', 'team': 'Team DC'},
+    {'name': 'Diana Prince', 'email': 'wonderwoman@dc.com', 'password': 'lasso_truth', 'team': 'Team DC'},
+    {'name': 'Barry Allen', 'email': 'flash@dc.com', 'password': 'speed_force', 'team': 'Team DC'},
+    {'name': 'Arthur Curry', 'email': 'aquaman@dc.com', 'password': 'ocean_king', 'team': 'Team DC'},
+]
+
+WORKOUTS = [
+    {
+        'name': 'Iron Man Suit Training',
+        'description': 'High-intensity workout to build endurance like Tony Stark',
+        'activity_type': 'HIIT',
+        'difficulty': 'Hard',
+        'duration': 45,
+        'calories_estimate': 600,
+        'exercises': [
+            {'name': 'Burpees', 'reps': 20, 'sets': 4},
+            {'name': 'Mountain Climbers', 'reps': 30, 'sets': 4},
+            {'name': 'Jump Squats', 'reps': 15, 'sets': 4}
+        ]
+    },
+    {
+        'name': 'Captain America Shield Drill',
+        'description': 'Build super soldier strength and agility',
+        'activity_type': 'Weight Training',
+        'difficulty': 'Hard',
+        'duration': 60,
+        'calories_estimate': 500,
+        'exercises': [
+            {'name': 'Bench Press', 'reps': 10, 'sets': 4},
+            {'name': 'Pull-ups', 'reps': 12, 'sets': 4},
+            {'name': 'Deadlifts', 'reps': 8, 'sets': 4}
+        ]
+    },
+    {
+        'name': 'Black Widow Flexibility Flow',
+        'description': 'Enhance flexibility and balance like Natasha',
+        'activity_type': 'Yoga',
+        'difficulty': 'Medium',
+        'duration': 45,
+        'calories_estimate': 250,
+        'exercises': [
+            {'name': 'Warrior Pose', 'duration': '2 minutes', 'sets': 3},
+            {'name': 'Tree Pose', 'duration': '1 minute', 'sets': 3},
+            {'name': 'Downward Dog', 'duration': '3 minutes', 'sets': 3}
+        ]
+    },
+    {
+        'name': 'Flash Speed Training',
+        'description': 'Speed and cardio workout inspired by the Scarlet Speedster',
+        'activity_type': 'Running',
+        'difficulty': 'Hard',
+        'duration': 40,
+        'calories_estimate': 550,
+        'exercises': [
+            {'name': 'Sprint Intervals', 'duration': '30 seconds', 'sets': 10},
+            {'name': 'High Knees', 'reps': 50, 'sets': 5},
+            {'name': 'Shuttle Runs', 'duration': '1 minute', 'sets': 5}
+        ]
+    },
+    {
+        'name': 'Wonder Woman Warrior Training',
+        'description': 'Full-body strength and power workout',
+        'activity_type': 'Weight Training',
+        'difficulty': 'Hard',
+        'duration': 55,
+        'calories_estimate': 520,
+        'exercises': [
+            {'name': 'Overhead Press', 'reps': 10, 'sets': 4},
+            {'name': 'Lunges', 'reps': 15, 'sets': 4},
+            {'name': 'Battle Ropes', 'duration': '1 minute', 'sets': 4}
+        ]
+    },
+    {
+        'name': 'Aquaman Ocean Swim',
+        'description': 'Swimming workout fit for the King of Atlantis',
+        'activity_type': 'Swimming',
+        'difficulty': 'Medium',
+        'duration': 50,
+        'calories_estimate': 450,
+        'exercises': [
+            {'name': 'Freestyle', 'distance': '500m', 'sets': 4},
+            {'name': 'Butterfly Stroke', 'distance': '200m', 'sets': 3},
+            {'name': 'Treading Water', 'duration': '5 minutes', 'sets': 2}
+        ]
+    },
+    {
+        'name': 'Batman Combat Training',
+        'description': 'Mixed martial arts and boxing workout',
+        'activity_type': 'Boxing',
+        'difficulty': 'Hard',
+        'duration': 50,
+        'calories_estimate': 580,
+        'exercises': [
+            {'name': 'Heavy Bag', 'duration': '3 minutes', 'sets': 5},
+            {'name': 'Speed Bag', 'duration': '2 minutes', 'sets': 5},
+            {'name': 'Shadow Boxing', 'duration': '3 minutes', 'sets': 4}
+        ]
+    },
+    {
+        'name': 'Beginner Hero Foundation',
+        'description': 'Start your superhero fitness journey',
+        'activity_type': 'Weight Training',
+        'difficulty': 'Easy',
+        'duration': 30,
+        'calories_estimate': 250,
+        'exercises': [
+            {'name': 'Bodyweight Squats', 'reps': 15, 'sets': 3},
+            {'name': 'Push-ups', 'reps': 10, 'sets': 3},
+            {'name': 'Planks', 'duration': '30 seconds', 'sets': 3}
+        ]
+    },
+]
+
+ACTIVITY_TYPES = ['Running', 'Swimming', 'Cycling', 'Weight Training', 'Yoga', 'Boxing', 'HIIT']
+DISTANCE_ACTIVITY_TYPES = ['Running', 'Swimming', 'Cycling']
+
+FIRST_NAMES = [
+    'Ada', 'Ben', 'Carla', 'Dev', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas',
+    'Kemi', 'Luis', 'Maya', 'Noah', 'Olga', 'Priya', 'Quinn', 'Rafael', 'Sofia', 'Tariq',
+]
+LAST_NAMES = [
+    'Almeida', 'Brown', 'Costa', 'Dubois', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ivanova', 'Jensen',
+    'Kim', 'Lopez', 'Moreau', 'Nakamura', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Weber',
+]
+TEAM_NAMES = [
+    'Falcons', 'Comets', 'Titans', 'Orcas', 'Wolves', 'Phoenix', 'Rockets', 'Lynx', 'Storm', 'Vipers',
+]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 class Command(BaseCommand):
     help = 'Populate the octofit_db database with test data'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=0,
+            help='Generate this many synthetic users instead of the superhero roster',
+        )
+        parser.add_argument(
+            '--teams', type=int, default=10,
+            help='Number of synthetic teams the generated users are spread across',
+        )
+        parser.add_argument(
+            '--activities-per-user', type=int, default=5,
+            help='Activities generated for every user',
+        )
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Spread activity dates over this many past days',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Random seed; the same seed always produces the same dataset',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Documents per insert_many/bulk_write call',
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Upsert the seed data on natural keys (team name, user email, workout name) '
+                 'instead of clearing the database first; only new users get activities',
+        )
+        parser.add_argument(
+            '--hash-workers', type=int, default=None,
+            help='Processes used to hash passwords (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--hash-iterations', type=int, default=None,
+            help='PBKDF2 iterations for the seeded passwords (default: PASSWORD_HASH_ITERATIONS); '
+                 'lower values are upgraded on first login',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # The leaderboard and rollups are rebuilt below with aggregations, so
+        # the per-activity incremental updates would only be wasted work here.
+        with leaderboard.paused():
+            if options['upsert']:
+                self.upsert(options)
+            else:
+                self.populate(options)
+
+    def insert(self, model, documents):
+        collection = get_collection(model)
+        count = 0
+        for batch in batched(documents, self.batch_size):
+            try:
+                count += len(collection.insert_many(batch, ordered=False).inserted_ids)
+            except BulkWriteError as exc:
+                # Synthetic activities that collide on the natural key are dropped
+                if any(error['code'] != DUPLICATE_KEY for error in exc.details['writeErrors']):
+                    raise
+                count += exc.details['nInserted']
+        return count
+
+    def hash_passwords(self, users, options):
+        passwords = hash_passwords(
+            (user['password'] for user in users), options['hash_workers'], options['hash_iterations'],
+        )
+        return [{**user, 'password': password} for user, password in zip(users, passwords)]
+
+    def bulk_upsert(self, model, key, updates):
+        """Apply ``(key value, update)`` pairs as upserts; returns (inserted key values, modified count)."""
+        collection = get_collection(model)
+        inserted, modified = [], 0
+        for batch in batched(updates, self.batch_size):
+            result = collection.bulk_write([
+                UpdateOne({key: value}, update, upsert=True) for value, update in batch
+            ], ordered=False)
+            inserted.extend(batch[index][0] for index in result.upserted_ids)
+            modified += result.modified_count
+        return inserted, modified
+
+    def upsert(self, options):
+        # Existing rows stay readable throughout: nothing is deleted, unchanged
+        # documents are no-op updates and the aggregates are rebuilt in place.
+        now = timezone.now()
+        if options['users']:
+            teams, users = self.synthetic_roster(options['users'], options['teams'])
+        else:
+            teams, users = HERO_TEAMS, HERO_USERS
+
+        # Existing users keep their password, team and name, so only new ones
+        # are hashed and added to their seed team
+        existing = set()
+        for batch in batched((user['email'] for user in users), self.batch_size):
+            existing.update(
+                user['email'] for user in get_collection(User).find({'email': {'$in': batch}}, {'email': 1})
+            )
+
+        self.stdout.write('Upserting teams...')
+        members = {team['name']: [] for team in teams}
+        for user in users:
+            if user['team'] in members and user['email'] not in existing:
+                members[user['team']].append(user['email'])
+        created, modified = self.bulk_upsert(Team, 'name', (
+            (team['name'], {
+                '$set': {'description': team['description']},
+                # Members who joined or moved through the API are kept
+                '$addToSet': {'members': {'$each': members[team['name']]}},
+                '$setOnInsert': {'created_at': now},
+            })
+            for team in teams
+        ))
+        changed = bool(created or modified)
+        self.stdout.write(self.style.SUCCESS(f'Teams: {len(created)} created, {modified} updated'))
+
+        self.stdout.write('Upserting users...')
+        passwords = {
+            user['email']: user['password']
+            for user in self.hash_passwords([user for user in users if user['email'] not in existing], options)
+        }
+        created, modified = self.bulk_upsert(User, 'email', (
+            (user['email'], {
+                '$setOnInsert': {
+                    **{field: value for field, value in user.items() if field not in ('email', 'password')},
+                    'created_at': now,
+                    'password': passwords.get(user['email'], ''),
+                },
+            })
+            for user in users
+        ))
+        changed = changed or bool(created or modified)
+        self.stdout.write(self.style.SUCCESS(f'Users: {len(created)} created, {modified} updated'))
+
+        self.stdout.write('Creating activities for new users...')
+        new_users = set(created)
+        activities_created = 0
+        for batch in batched(self.generate_activities(
+            [user for user in users if user['email'] in new_users],
+            options['activities_per_user'], options['days'], now,
+        ), self.batch_size):
+            activities_created += sum(object_id is not None for object_id in insert_activities(batch))
+        changed = changed or bool(activities_created)
+        self.stdout.write(self.style.SUCCESS(f'Created {activities_created} activities'))
+
+        self.stdout.write('Upserting workout suggestions...')
+        created, modified = self.bulk_upsert(Workout, 'name', (
+            (workout['name'], {'$set': {field: value for field, value in workout.items() if field != 'name'}})
+            for workout in WORKOUTS
+        ))
+        if created or modified:
+            caching.invalidate(Workout)
+        self.stdout.write(self.style.SUCCESS(f'Workouts: {len(created)} created, {modified} updated'))
+
+        if changed:
+            self.stdout.write('Rebuilding leaderboard and activity rollups...')
+            leaderboard_count = leaderboard.rebuild()
+            rollup_count = rollups.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {leaderboard_count} leaderboard entries and {rollup_count} activity rollups'
+            ))
+        self.stdout.write(self.style.SUCCESS('Database upsert completed successfully!'))
+
+    def populate(self, options):
         self.stdout.write('Clearing existing data...')
-        
-        # Delete existing data using Django ORM
-        Activity.objects.all().delete()
-        Leaderboard.objects.all().delete()
-        User.objects.all().delete()
-        Team.objects.all().delete()
-        Workout.objects.all().delete()
-        
+
+        # Bypass the ORM so clearing a large dataset doesn't load every row
+        for model in (Activity, ActivityRollup, Leaderboard, User, Team, Workout):
+            get_collection(model).delete_many({})
+
         self.stdout.write(self.style.SUCCESS('Existing data cleared'))
-        
+
+        now = timezone.now()
+        if options['users']:
+            teams, users = self.synthetic_roster(options['users'], options['teams'])
+        else:
+            teams, users = HERO_TEAMS, HERO_USERS
+
         # Create Teams
         self.stdout.write('Creating teams...')
-        team_marvel = Team.objects.create(
-            name='Team Marvel',
-            description='Earth\'s Mightiest Heroes fighting for fitness',
-            members=[]
-        )
-        
-        team_dc = Team.objects.create(
-            name='Team DC',
-            description='Justice League champions of wellness',
-            members=[]
-        )
-        
-        self.stdout.write(self.style.SUCCESS(f'Created teams: {team_marvel.name}, {team_dc.name}'))
-        
-        # Create Marvel Users
-        self.stdout.write('Creating Marvel superheroes...')
-        marvel_users = [
-            User.objects.create(
-                name='Tony Stark',
-                email='ironman@marvel.com',
-                password='arc_reactor_3000',
-                team='Team Marvel'
-            ),
-            User.objects.create(
-                name='Steve Rogers',
-                email='captain@marvel.com',
-                password='shield_throw_99',
-                team='Team Marvel'
-            ),
-            User.objects.create(
-                name='Natasha Romanoff',
-                email='blackwidow@marvel.com',
-                password='red_in_ledger',
-                team='Team Marvel'
-            ),
-            User.objects.create(
-                name='Bruce Banner',
-                email='hulk@marvel.com',
-                password='angry_science',
-                team='Team Marvel'
-            ),
-            User.objects.create(
-                name='Thor Odinson',
-                email='thor@marvel.com',
-                password='worthiness_check',
-                team='Team Marvel'
-            ),
-        ]
-        
-        # Create DC Users
-        self.stdout.write('Creating DC superheroes...')
-        dc_users = [
-            User.objects.create(
-                name='Clark Kent',
-                email='superman@dc.com',
-                password='kryptonite_fear',
-                team='Team DC'
-            ),
-            User.objects.create(
-                name='Bruce Wayne',
-                email='batman@dc.com',
-                password='im_batman',
-                team='Team DC'
-            ),
-            User.objects.create(
-                name='Diana Prince',
-                email='wonderwoman@dc.com',
-                password='lasso_truth',
-                team='Team DC'
-            ),
-            User.objects.create(
-                name='Barry Allen',
-                email='flash@dc.com',
-                password='speed_force',
-                team='Team DC'
-            ),
-            User.objects.create(
-                name='Arthur Curry',
-                email='aquaman@dc.com',
-                password='ocean_king',
-                team='Team DC'
-            ),
-        ]
-        
-        all_users = marvel_users + dc_users
-        self.stdout.write(self.style.SUCCESS(f'Created {len(all_users)} superheroes'))
-        
-        # Update team members
-        team_marvel.members = [u.email for u in marvel_users]
-        team_marvel.save()
-        team_dc.members = [u.email for u in dc_users]
-        team_dc.save()
-        
+        members = {team['name']: [] for team in teams}
+        for user in users:
+            if user['team'] in members:
+                members[user['team']].append(user['email'])
+        teams_created = self.insert(Team, (
+            {**team, 'members': members[team['name']], 'created_at': now} for team in teams
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Created {teams_created} teams'))
+
+        # Create Users
+        self.stdout.write('Creating users...')
+        users_created = self.insert(User, (
+            {**user, 'created_at': now} for user in self.hash_passwords(users, options)
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Created {users_created} users'))
+
         # Create Activities
         self.stdout.write('Creating activities...')
-        activity_types = ['Running', 'Swimming', 'Cycling', 'Weight Training', 'Yoga', 'Boxing', 'HIIT']
-        activities_created = 0
-        
-        for user in all_users:
-            for i in range(5):
-                import random
-                activity_type = random.choice(activity_types)
-                duration = random.randint(30, 120)
-                calories = duration * random.randint(5, 12)
-                distance = round(random.uniform(3, 15), 2) if activity_type in ['Running', 'Swimming', 'Cycling'] else None
-                
-                Activity.objects.create(
-                    user_email=user.email,
-                    activity_type=activity_type,
-                    duration=duration,
-                    calories=calories,
-                    distance=distance,
-                    date=timezone.now() - timedelta(days=random.randint(0, 30)),
-                    notes=f'{user.name} crushing it with {activity_type}!'
-                )
-                activities_created += 1
-        
+        activities_created = self.insert(Activity, self.generate_activities(
+            users, options['activities_per_user'], options['days'], now,
+        ))
         self.stdout.write(self.style.SUCCESS(f'Created {activities_created} activities'))
-        
+
         # Create Leaderboard entries
         self.stdout.write('Creating leaderboard...')
-        leaderboard_data = []
-        
-        for user in all_users:
-            user_activities = Activity.objects.filter(user_email=user.email)
-            total_calories = sum(a.calories for a in user_activities)
-            total_duration = sum(a.duration for a in user_activities)
-            total_activities_count = user_activities.count()
-            
-            leaderboard_data.append({
-                'user': user,
-                'total_calories': total_calories,
-                'total_duration': total_duration,
-                'total_activities': total_activities_count
-            })
-        
-        # Sort by total calories to assign rank
-        leaderboard_data.sort(key=lambda x: x['total_calories'], reverse=True)
-        
-        for rank, data in enumerate(leaderboard_data, start=1):
-            Leaderboard.objects.create(
-                user_email=data['user'].email,
-                team=data['user'].team,
-                total_calories=data['total_calories'],
-                total_activities=data['total_activities'],
-                total_duration=data['total_duration'],
-                rank=rank
-            )
-        
-        self.stdout.write(self.style.SUCCESS(f'Created {len(leaderboard_data)} leaderboard entries'))
+        leaderboard_count = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Created {leaderboard_count} leaderboard entries'))
+
+        # Create activity rollups
+        self.stdout.write('Creating activity rollups...')
+        rollup_count = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Created {rollup_count} activity rollups'))
         
         # Create Workouts
         self.stdout.write('Creating workout suggestions...')
-        workouts = [
-            Workout.objects.create(
-                name='Iron Man Suit Training',
-                description='High-intensity workout to build endurance like Tony Stark',
-                activity_type='HIIT',
-                difficulty='Hard',
-                duration=45,
-                calories_estimate=600,
-                exercises=[
-                    {'name': 'Burpees', 'reps': 20, 'sets': 4},
-                    {'name': 'Mountain Climbers', 'reps': 30, 'sets': 4},
-                    {'name': 'Jump Squats', 'reps': 15, 'sets': 4}
-                ]
-            ),
-            Workout.objects.create(
-                name='Captain America Shield Drill',
-                description='Build super soldier strength and agility',
-                activity_type='Weight Training',
-                difficulty='Hard',
-                duration=60,
-                calories_estimate=500,
-                exercises=[
-                    {'name': 'Bench Press', 'reps': 10, 'sets': 4},
-                    {'name': 'Pull-ups', 'reps': 12, 'sets': 4},
-                    {'name': 'Deadlifts', 'reps': 8, 'sets': 4}
-                ]
-            ),
-            Workout.objects.create(
-                name='Black Widow Flexibility Flow',
-                description='Enhance flexibility and balance like Natasha',
-                activity_type='Yoga',
-                difficulty='Medium',
-                duration=45,
-                calories_estimate=250,
-                exercises=[
-                    {'name': 'Warrior Pose', 'duration': '2 minutes', 'sets': 3},
-                    {'name': 'Tree Pose', 'duration': '1 minute', 'sets': 3},
-                    {'name': 'Downward Dog', 'duration': '3 minutes', 'sets': 3}
-                ]
-            ),
-            Workout.objects.create(
-                name='Flash Speed Training',
-                description='Speed and cardio workout inspired by the Scarlet Speedster',
-                activity_type='Running',
-                difficulty='Hard',
-                duration=40,
-                calories_estimate=550,
-                exercises=[
-                    {'name': 'Sprint Intervals', 'duration': '30 seconds', 'sets': 10},
-                    {'name': 'High Knees', 'reps': 50, 'sets': 5},
-                    {'name': 'Shuttle Runs', 'duration': '1 minute', 'sets': 5}
-                ]
-            ),
-            Workout.objects.create(
-                name='Wonder Woman Warrior Training',
-                description='Full-body strength and power workout',
-                activity_type='Weight Training',
-                difficulty='Hard',
-                duration=55,
-                calories_estimate=520,
-                exercises=[
-                    {'name': 'Overhead Press', 'reps': 10, 'sets': 4},
-                    {'name': 'Lunges', 'reps': 15, 'sets': 4},
-                    {'name': 'Battle Ropes', 'duration': '1 minute', 'sets': 4}
-                ]
-            ),
-            Workout.objects.create(
-                name='Aquaman Ocean Swim',
-                description='Swimming workout fit for the King of Atlantis',
-                activity_type='Swimming',
-                difficulty='Medium',
-                duration=50,
-                calories_estimate=450,
-                exercises=[
-                    {'name': 'Freestyle', 'distance': '500m', 'sets': 4},
-                    {'name': 'Butterfly Stroke', 'distance': '200m', 'sets': 3},
-                    {'name': 'Treading Water', 'duration': '5 minutes', 'sets': 2}
-                ]
-            ),
-            Workout.objects.create(
-                name='Batman Combat Training',
-                description='Mixed martial arts and boxing workout',
-                activity_type='Boxing',
-                difficulty='Hard',
-                duration=50,
-                calories_estimate=580,
-                exercises=[
-                    {'name': 'Heavy Bag', 'duration': '3 minutes', 'sets': 5},
-                    {'name': 'Speed Bag', 'duration': '2 minutes', 'sets': 5},
-                    {'name': 'Shadow Boxing', 'duration': '3 minutes', 'sets': 4}
-                ]
-            ),
-            Workout.objects.create(
-                name='Beginner Hero Foundation',
-                description='Start your superhero fitness journey',
-                activity_type='Weight Training',
-                difficulty='Easy',
-                duration=30,
-                calories_estimate=250,
-                exercises=[
-                    {'name': 'Bodyweight Squats', 'reps': 15, 'sets': 3},
-                    {'name': 'Push-ups', 'reps': 10, 'sets': 3},
-                    {'name': 'Planks', 'duration': '30 seconds', 'sets': 3}
-                ]
-            ),
-        ]
-        
-        self.stdout.write(self.style.SUCCESS(f'Created {len(workouts)} workout suggestions'))
-        
+        workouts_created = self.insert(Workout, (dict(workout) for workout in WORKOUTS))
+        caching.invalidate(Workout)
+        self.stdout.write(self.style.SUCCESS(f'Created {workouts_created} workout suggestions'))
+
         self.stdout.write(self.style.SUCCESS('Database population completed successfully!'))
         self.stdout.write(f'Total Users: {User.objects.count()}')
         self.stdout.write(f'Total Teams: {Team.objects.count()}')
         self.stdout.write(f'Total Activities: {Activity.objects.count()}')
         self.stdout.write(f'Total Leaderboard Entries: {Leaderboard.objects.count()}')
         self.stdout.write(f'Total Workouts: {Workout.objects.count()}')
+
+    def synthetic_roster(self, user_count, team_count):
+        teams = []
+        for i in range(team_count):
+            name = f'Team {TEAM_NAMES[i % len(TEAM_NAMES)]}'
+            if i >= len(TEAM_NAMES):
+                name = f'{name} {i // len(TEAM_NAMES) + 1}'
+            teams.append({'name': name, 'description': f'{name} training squad'})
+
+        users = []
+        for i in range(user_count):
+            first = self.rng.choice(FIRST_NAMES)
+            last = self.rng.choice(LAST_NAMES)
+            users.append({
+                'name': f'{first} {last}',
+                # Only the index, so an unseeded --upsert matches the users it made before
+                'email': f'athlete{i}@octofit.test',
+                'password': f'synthetic_{i}',
+                'team': teams[i % team_count]['name'] if teams else '',
+            })
+        return teams, users
+
+    def generate_activities(self, users, per_user, days, now):
+        rng = self.rng
+        for user in users:
+            for _ in range(per_user):
+                activity_type = rng.choice(ACTIVITY_TYPES)
+                duration = rng.randint(30, 120)
+                yield {
+                    'user_email': user['email'],
+                    'activity_type': activity_type,
+                    'duration': duration,
+                    'calories': duration * rng.randint(5, 12),
+                    'distance': round(rng.uniform(3, 15), 2) if activity_type in DISTANCE_ACTIVITY_TYPES else None,
+                    'date': now - timedelta(days=rng.randint(0, days), seconds=rng.randint(0, 86399)),
+                    'notes': f'{user["name"]} crushing it with {activity_type}!',
+                }
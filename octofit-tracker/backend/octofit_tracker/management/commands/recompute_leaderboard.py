@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+from octofit_tracker import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the leaderboard from all activities with a single MongoDB aggregation'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Recomputing leaderboard...')
+        started = time.monotonic()
+        rows = leaderboard.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} leaderboard entries in {elapsed:.2f}s'))
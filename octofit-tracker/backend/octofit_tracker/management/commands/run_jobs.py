@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from octofit_tracker import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (leaderboard rebuilds, rollups, indexes, reseeding)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once no job is due instead of polling for new ones',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='Exit after running this many jobs',
+        )
+        parser.add_argument(
+            '--lease', type=int, default=None,
+            help='Seconds a claimed job stays locked without a heartbeat before another worker '
+                 'may retry it (default: JOB_LEASE_SECONDS)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ran = jobs.work(options['burst'], options['poll_interval'], options['max_jobs'], options['lease'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker stopped')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} jobs'))
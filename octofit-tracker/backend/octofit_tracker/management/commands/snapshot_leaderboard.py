@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from octofit_tracker import leaderboard
+from octofit_tracker.models import LeaderboardSnapshot
+from octofit_tracker.mongo import get_collection
+
+
+class Command(BaseCommand):
+    help = 'Append the current user and team boards to the leaderboard snapshots (run e.g. daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days', type=int, default=None,
+            help='Delete snapshots older than this many days',
+        )
+
+    def handle(self, *args, **options):
+        taken_at = leaderboard.snapshot()
+        snapshots = get_collection(LeaderboardSnapshot)
+        rows = snapshots.count_documents({'taken_at': taken_at})
+        self.stdout.write(self.style.SUCCESS(f'Snapshot of {rows} rows taken at {taken_at:%Y-%m-%d %H:%M:%S}'))
+
+        if options['keep_days'] is not None:
+            cutoff = taken_at - timedelta(days=options['keep_days'])
+            deleted = snapshots.delete_many({'taken_at': {'$lt': cutoff}}).deleted_count
+            self.stdout.write(f'Deleted {deleted} snapshot rows older than {cutoff:%Y-%m-%d %H:%M:%S}')
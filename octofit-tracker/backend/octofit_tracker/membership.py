@@ -0,0 +1,82 @@
+"""Team membership changes as atomic single-document updates.
+
+``User.team`` is the source of truth and is changed with a compare-and-set,
+so concurrent requests for the same user cannot both win. ``Team.members`` is
+then adjusted with ``$addToSet``/``$pull`` instead of rewriting the array.
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from . import leaderboard
+from .models import Team, User
+from .mongo import get_collection
+
+
+class MembershipError(Exception):
+    status = 400
+
+
+class NotFound(MembershipError):
+    status = 404
+
+
+class Conflict(MembershipError):
+    status = 409
+
+
+def get_team(team_id):
+    """Return the team's ``_id`` and ``name`` without loading its member list."""
+    try:
+        team_id = ObjectId(team_id)
+    except (InvalidId, TypeError):
+        raise NotFound('Team not found')
+    team = get_collection(Team).find_one({'_id': team_id}, {'name': 1})
+    if team is None:
+        raise NotFound('Team not found')
+    return team
+
+
+def member_count(team):
+    result = list(get_collection(Team).aggregate([
+        {'$match': {'_id': team['_id']}},
+        {'$project': {'count': {'$size': {'$ifNull': ['$members', []]}}}},
+    ]))
+    return result[0]['count'] if result else 0
+
+
+def _current_team(email):
+    user = get_collection(User).find_one({'email': email}, {'team': 1})
+    if user is None:
+        raise NotFound(f'User {email} not found')
+    return user.get('team') or None
+
+
+def _set_user_team(email, expected, team_name):
+    result = get_collection(User).update_one(
+        {'email': email, 'team': expected if expected else {'$in': [None, '']}},
+        {'$set': {'team': team_name}},
+    )
+    if not result.matched_count:
+        raise Conflict(f'Team of {email} changed concurrently, retry the request')
+    leaderboard.change_team(email, team_name)
+
+
+def join(team, email, move=False):
+    """Add ``email`` to ``team``; with ``move`` the user leaves any other team first."""
+    current = _current_team(email)
+    teams = get_collection(Team)
+    if current != team['name']:
+        if current and not move:
+            raise Conflict(f'{email} already belongs to {current}; use move instead')
+        _set_user_team(email, current, team['name'])
+        if current:
+            teams.update_one({'name': current}, {'$pull': {'members': email}})
+    teams.update_one({'_id': team['_id']}, {'$addToSet': {'members': email}})
+
+
+def leave(team, email):
+    current = _current_team(email)
+    if current != team['name']:
+        raise Conflict(f'{email} is not a member of {team["name"]}')
+    _set_user_team(email, current, None)
+    get_collection(Team).update_one({'_id': team['_id']}, {'$pull': {'members': email}})
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, primary_key=True, serialize=False)),
+                ('user_email', models.EmailField(max_length=254)),
+                ('bucket', models.CharField(max_length=10)),
+                ('period_start', models.DateTimeField()),
+                ('total_calories', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('total_distance', models.FloatField(default=0)),
+                ('activity_count', models.IntegerField(default=0)),
+                ('activity_types', djongo.models.fields.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'activity_rollups',
+                'indexes': [models.Index(fields=['user_email', 'bucket', 'period_start'], name='rollup_user_bucket_period_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:20
+
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0004_activity_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=10)),
+                ('key', models.CharField(max_length=254)),
+                ('team', models.CharField(blank=True, max_length=200)),
+                ('total_calories', models.IntegerField(default=0)),
+                ('total_activities', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('rank', models.IntegerField(default=0)),
+                ('taken_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'leaderboard_snapshots',
+                'indexes': [
+                    models.Index(fields=['kind', 'key', 'taken_at'], name='snapshot_kind_key_taken_idx'),
+                    models.Index(fields=['taken_at'], name='snapshot_taken_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamStanding',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, primary_key=True, serialize=False)),
+                ('team', models.CharField(max_length=200)),
+                ('total_calories', models.IntegerField(default=0)),
+                ('total_activities', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('rank', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'team_standings',
+                'indexes': [
+                    models.Index(fields=['rank'], name='standing_rank_idx'),
+                    models.Index(fields=['team'], name='standing_team_idx'),
+                    models.Index(fields=['total_calories', 'rank'], name='standing_calories_rank_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 21:05
+
+from django.db import migrations, models
+import djongo.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0005_team_standings_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('kwargs', djongo.models.fields.JSONField(default=dict)),
+                ('key', models.CharField(max_length=500)),
+                ('status', models.CharField(default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('run_at', models.DateTimeField()),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'jobs',
+                'indexes': [
+                    models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+                    models.Index(fields=['key', 'status'], name='job_key_status_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='activity',
+            constraint=models.UniqueConstraint(fields=('user_email', 'date', 'activity_type'), name='activity_natural_key_uniq'),
+        ),
+    ]
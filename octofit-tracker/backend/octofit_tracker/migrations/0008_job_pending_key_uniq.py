@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+def create_index(apps, schema_editor):
+    from octofit_tracker.mongo import get_db
+
+    get_db(schema_editor.connection.alias)['jobs'].create_index(
+        [('key', 1)], name='job_pending_key_uniq', unique=True, partialFilterExpression={'status': 'pending'},
+    )
+
+
+def drop_index(apps, schema_editor):
+    from octofit_tracker.mongo import get_db
+
+    get_db(schema_editor.connection.alias)['jobs'].drop_index('job_pending_key_uniq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0007_activity_natural_key'),
+    ]
+
+    operations = [
+        # djongo drops the WHERE clause of a conditional unique constraint, so
+        # the partial index is created directly.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_index, drop_index)],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='job',
+                    constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('key',), name='job_pending_key_uniq'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-18 23:35
+
+from django.db import migrations, models
+import octofit_tracker.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0008_job_pending_key_uniq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='activity_type',
+            field=models.CharField(max_length=100, validators=[octofit_tracker.models.validate_activity_type]),
+        ),
+    ]
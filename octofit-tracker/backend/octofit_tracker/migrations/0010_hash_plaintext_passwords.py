@@ -0,0 +1,52 @@
+# Generated by Django 4.1.7 on 2026-10-19 09:20
+
+from django.contrib.auth import hashers
+from django.db import migrations
+from pymongo import UpdateOne
+
+# Kept low so the migration is quick; authenticate() re-hashes at
+# PASSWORD_HASH_ITERATIONS on each user's next login
+ITERATIONS = 1000
+BATCH_SIZE = 1000
+
+
+def is_hashed(password):
+    if not password or password.startswith(hashers.UNUSABLE_PASSWORD_PREFIX):
+        return True
+    try:
+        hashers.identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+def hash_plaintext_passwords(apps, schema_editor):
+    from octofit_tracker.mongo import get_db
+
+    users = get_db(schema_editor.connection.alias)['users']
+    hasher = hashers.get_hasher()
+    requests = []
+    for user in users.find({'password': {'$type': 'string'}}, {'password': 1}):
+        if is_hashed(user['password']):
+            continue
+        encoded = hasher.encode(user['password'], hasher.salt(), ITERATIONS)
+        # Matching on the old value leaves a password changed meanwhile alone
+        requests.append(UpdateOne(
+            {'_id': user['_id'], 'password': user['password']}, {'$set': {'password': encoded}},
+        ))
+        if len(requests) >= BATCH_SIZE:
+            users.bulk_write(requests, ordered=False)
+            requests = []
+    if requests:
+        users.bulk_write(requests, ordered=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('octofit_tracker', '0009_activity_type_validator'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_plaintext_passwords, migrations.RunPython.noop),
+    ]
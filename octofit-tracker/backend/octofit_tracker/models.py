@@ -1,7 +1,14 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from djongo import models as djongo_models
 
 
+def validate_activity_type(value):
+    # Rollups count activities under activity_types.<type>, a MongoDB field path
+    if '.' in value or value.startswith('$'):
+        raise ValidationError('Activity type must not contain "." or start with "$".')
+
+
 class User(models.Model):
     _id = djongo_models.ObjectIdField(primary_key=True)
     name = models.CharField(max_length=200)
@@ -34,7 +41,7 @@ class Team(models.Model):
 class Activity(models.Model):
     _id = djongo_models.ObjectIdField(primary_key=True)
     user_email = models.EmailField()
-    activity_type = models.CharField(max_length=100)
+    activity_type = models.CharField(max_length=100, validators=[validate_activity_type])
     duration = models.IntegerField()  # in minutes
     calories = models.IntegerField()
     distance = models.FloatField(blank=True, null=True)  # in kilometers
@@ -43,6 +50,16 @@ class Activity(models.Model):
     
     class Meta:
         db_table = 'activities'
+        indexes = [
+            # Keyset pages sort on (date, _id), so _id completes each index
+            models.Index(fields=['user_email', 'date', '_id'], name='activity_user_date_id_idx'),
+            models.Index(fields=['activity_type', 'date', '_id'], name='activity_type_date_id_idx'),
+            models.Index(fields=['date', '_id'], name='activity_date_id_idx'),
+        ]
+        constraints = [
+            # The natural key bulk ingestion deduplicates re-sent activities on
+            models.UniqueConstraint(fields=['user_email', 'date', 'activity_type'], name='activity_natural_key_uniq'),
+        ]
     
     def __str__(self):
         return f"{self.user_email} - {self.activity_type}"
@@ -60,11 +77,60 @@ class Leaderboard(models.Model):
     
     class Meta:
         db_table = 'leaderboard'
+        indexes = [
+            models.Index(fields=['rank'], name='leaderboard_rank_idx'),
+            models.Index(fields=['team', 'rank'], name='leaderboard_team_rank_idx'),
+            models.Index(fields=['user_email'], name='leaderboard_user_idx'),
+            models.Index(fields=['total_calories', 'rank'], name='leaderboard_calories_rank_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user_email} - Rank {self.rank}"
 
 
+class TeamStanding(models.Model):
+    _id = djongo_models.ObjectIdField(primary_key=True)
+    team = models.CharField(max_length=200)
+    total_calories = models.IntegerField(default=0)
+    total_activities = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # in minutes
+    rank = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'team_standings'
+        indexes = [
+            models.Index(fields=['rank'], name='standing_rank_idx'),
+            models.Index(fields=['team'], name='standing_team_idx'),
+            models.Index(fields=['total_calories', 'rank'], name='standing_calories_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.team} - Rank {self.rank}"
+
+
+class LeaderboardSnapshot(models.Model):
+    _id = djongo_models.ObjectIdField(primary_key=True)
+    kind = models.CharField(max_length=10)  # user or team
+    key = models.CharField(max_length=254)  # user email or team name
+    team = models.CharField(max_length=200, blank=True)
+    total_calories = models.IntegerField(default=0)
+    total_activities = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # in minutes
+    rank = models.IntegerField(default=0)
+    taken_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'leaderboard_snapshots'
+        indexes = [
+            models.Index(fields=['kind', 'key', 'taken_at'], name='snapshot_kind_key_taken_idx'),
+            models.Index(fields=['taken_at'], name='snapshot_taken_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.key} - Rank {self.rank} at {self.taken_at:%Y-%m-%d %H:%M}"
+
+
 class Workout(models.Model):
     _id = djongo_models.ObjectIdField(primary_key=True)
     name = models.CharField(max_length=200)
@@ -77,6 +143,62 @@ class Workout(models.Model):
     
     class Meta:
         db_table = 'workouts'
+        indexes = [
+            models.Index(fields=['activity_type', 'difficulty'], name='workout_type_difficulty_idx'),
+            models.Index(fields=['difficulty'], name='workout_difficulty_idx'),
+        ]
     
     def __str__(self):
         return self.name
+
+
+class ActivityRollup(models.Model):
+    _id = djongo_models.ObjectIdField(primary_key=True)
+    user_email = models.EmailField()
+    bucket = models.CharField(max_length=10)  # day, week, month or all
+    period_start = models.DateTimeField()
+    total_calories = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # in minutes
+    total_distance = models.FloatField(default=0)  # in kilometers
+    activity_count = models.IntegerField(default=0)
+    activity_types = djongo_models.JSONField(default=dict)  # activity_type -> count
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'activity_rollups'
+        indexes = [
+            models.Index(fields=['user_email', 'bucket', 'period_start'], name='rollup_user_bucket_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_email} - {self.bucket} {self.period_start:%Y-%m-%d}"
+
+
+class Job(models.Model):
+    _id = djongo_models.ObjectIdField(primary_key=True)
+    name = models.CharField(max_length=100)
+    kwargs = djongo_models.JSONField(default=dict)
+    key = models.CharField(max_length=500)  # name and arguments; one pending job per key
+    status = models.CharField(max_length=10, default='pending')  # pending, running or failed
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_at = models.DateTimeField()
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+            models.Index(fields=['key', 'status'], name='job_key_status_idx'),
+        ]
+        constraints = [
+            # Created with a partialFilterExpression by migration 0008, which
+            # djongo cannot express
+            models.UniqueConstraint(fields=['key'], condition=models.Q(status='pending'), name='job_pending_key_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection counts of the pooled clients' pools, per server address."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(Counter)
+
+    def _add(self, event, **deltas):
+        address = '%s:%s' % event.address
+        with self._lock:
+            self._stats[address].update(deltas)
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._stats.items()}
+
+    def connection_created(self, event):
+        self._add(event, created=1, open=1)
+
+    def connection_closed(self, event):
+        self._add(event, closed=1, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(event, waiting=1)
+
+    def connection_checked_out(self, event):
+        self._add(event, waiting=-1, checked_out=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(event, waiting=-1, check_out_failed=1)
+
+    def connection_checked_in(self, event):
+        self._add(event, checked_out=-1)
+
+    def pool_cleared(self, event):
+        self._add(event, cleared=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_stats = PoolStats()
+
+
+def get_client(using='default'):
+    """Return the process-wide pooled MongoClient for ``using``.
+
+    Unlike djongo's connection, which is closed at the end of every request,
+    this client and its pool live for the whole process. A new one is created
+    after a fork, since pymongo clients must not be shared across processes.
+    """
+    key = (using, os.getpid())
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = MongoClient(
+                    **connections[using].settings_dict.get('CLIENT', {}),
+                    event_listeners=[pool_stats],
+                )
+    return client
+
+
+def get_db(using='default'):
+    return get_client(using)[connections[using].settings_dict['NAME']]
+
+
+def get_collection(model, using='default'):
+    return get_db(using)[model._meta.db_table]
+
+
+def warmup(using='default', size=None, connect_django=True):
+    """Open ``size`` pooled connections (default: minPoolSize, at least 1) before the first request.
+
+    Called from the WSGI/ASGI entry points when ``MONGO_WARMUP`` is on. Under
+    ``gunicorn --preload`` call it from a ``post_fork`` hook instead, so each
+    worker warms its own pool. ``connect_django=False`` only pings through
+    pymongo: uvicorn imports the ASGI module inside its event loop, where
+    opening djongo's connection raises ``SynchronousOnlyOperation``, and ASGI
+    requests use per-thread Django connections anyway.
+    """
+    if not settings.MONGO_WARMUP:
+        return
+    try:
+        client = get_client(using)
+        size = size or client.min_pool_size or 1
+        # Concurrent pings each need their own connection
+        with ThreadPoolExecutor(size) as pool:
+            list(pool.map(lambda _: client.admin.command('ping'), range(size)))
+        if connect_django:
+            connections[using].ensure_connection()
+    except PyMongoError as exc:
+        logger.warning('MongoDB warmup failed: %s', exc)
@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination
+
+
+def with_tiebreak(ordering):
+    """``ordering`` followed by ``_id`` in the same direction, so rows with equal keys keep a fixed order."""
+    if ordering.lstrip('-') == '_id':
+        return ordering
+    return (ordering, '-_id' if ordering.startswith('-') else '_id')
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that seeks on an indexed field instead of skipping rows.
+
+    Subclasses order on a field plus ``_id``; the repository reads seek on the same pair.
+    """
+    ordering = '_id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ActivityPagination(KeysetPagination):
+    ordering = with_tiebreak('-date')
+
+
+class LeaderboardPagination(KeysetPagination):
+    ordering = with_tiebreak('rank')
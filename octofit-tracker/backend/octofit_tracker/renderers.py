@@ -0,0 +1,59 @@
+"""JSON renderers that write ObjectIds and datetimes straight into the output.
+
+Serializers hand ``ObjectId`` values through untouched, so no row is copied
+just to stringify its ``_id``; the encoder turns them into strings while the
+response is written. ``FastJSONRenderer`` does the same with orjson and can be
+swapped in through ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']``.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .serializers import _utc_isoformat
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, datetime):
+            # MongoDB hands back naive UTC datetimes
+            return _utc_isoformat(obj)
+        return super().default(obj)
+
+
+_encoder = JSONEncoder()
+
+
+def to_json(value):
+    """``default`` hook for ``json.dumps``/orjson with the renderer's conversions."""
+    return _encoder.default(value)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    encoder_class = JSONEncoder
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """orjson-backed renderer; ``orjson`` must be installed to use it."""
+    options = orjson and orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def __init__(self):
+        if orjson is None:
+            raise ImproperlyConfigured('FastJSONRenderer requires the orjson package')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=to_json, option=options)
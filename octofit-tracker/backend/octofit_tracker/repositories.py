@@ -0,0 +1,168 @@
+"""Direct pymongo reads for the hot list, ``by_*`` and retrieve paths.
+
+Going through the ORM costs a SQL compile in Django and a SQL parse in
+djongo on every call; a ``Repository`` builds the Mongo query itself, reads
+only the serialized fields through the pooled client and renders rows with
+the model's row serializer. Lists use keyset pagination on the ordering of
+the viewset's pagination class (or an explicit one) plus ``_id``, with the
+same ``next``/``previous``/``results`` envelope as the DRF paginator.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from rest_framework.utils.urls import replace_query_param
+
+from . import instrumentation
+from .mongo import get_collection
+from .pagination import KeysetPagination
+from .serializers import row_serializer_for
+
+LOOKUPS = {'gt': '$gt', 'gte': '$gte', 'lt': '$lt', 'lte': '$lte', 'in': '$in', 'ne': '$ne'}
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def to_mongo_filter(filters):
+    """Translate ORM-style ``field__lookup`` keyword filters to a Mongo query."""
+    query = {}
+    for key, value in filters.items():
+        field, _, lookup = key.partition('__')
+        if lookup:
+            if lookup not in LOOKUPS:
+                raise ValueError(f'Unsupported lookup: {key}')
+            condition = query.setdefault(field, {})
+            condition[LOOKUPS[lookup]] = list(value) if lookup == 'in' else value
+        else:
+            query[field] = value
+    return query
+
+
+class Repository:
+    def __init__(self, model, serializer_class, pagination_class=KeysetPagination, ordering=None, fields=None):
+        ordering = ordering or pagination_class.ordering
+        if not isinstance(ordering, str):
+            # ``_id`` always breaks ties below, in the same direction
+            ordering = ordering[0]
+        self.model = model
+        self.serializer = row_serializer_for(serializer_class, fields)
+        self.page_size = pagination_class.page_size
+        self.max_page_size = pagination_class.max_page_size
+        self.page_size_query_param = pagination_class.page_size_query_param
+        self.direction = -1 if ordering.startswith('-') else 1
+        self.order_field = ordering.lstrip('-')
+        self.order_is_datetime = model._meta.get_field(self.order_field).get_internal_type() == 'DateTimeField'
+        self.projection = {field: 1 for field in {*self.serializer.source_fields, self.order_field}}
+
+    @property
+    def collection(self):
+        return get_collection(self.model)
+
+    def get(self, pk):
+        """Return the serialized document with primary key ``pk``, or ``None``."""
+        try:
+            object_id = ObjectId(pk)
+        except (InvalidId, TypeError):
+            return None
+        document = self.collection.find_one({'_id': object_id}, self.projection)
+        if document is None:
+            return None
+        return self.serialize([document])[0]
+
+    def page(self, request, filters=None):
+        """Return one page of documents matching the ORM-style ``filters``."""
+        query, sort, limit, cursor = self.page_query(request, filters or {})
+        documents = list(self.collection.find(query, self.projection, sort=sort, limit=limit))
+        return self.page_envelope(request, documents, cursor, limit - 1)
+
+    def serialize(self, documents):
+        with instrumentation.serializing():
+            return self.serializer.to_representation(documents)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, document, reverse):
+        position = document.get(self.order_field)
+        if isinstance(position, datetime):
+            position = position.isoformat()
+        elif isinstance(position, ObjectId):
+            position = str(position)
+        payload = json.dumps([position, str(document['_id']), int(reverse)])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            position, object_id, reverse = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if self.order_field == '_id':
+                position = ObjectId(position)
+            elif self.order_is_datetime and position is not None:
+                position = datetime.fromisoformat(position)
+            return position, ObjectId(object_id), bool(reverse)
+        except (ValueError, TypeError, InvalidId, binascii.Error):
+            raise InvalidCursor
+
+    def seek(self, position, object_id, direction):
+        op = '$gt' if direction == 1 else '$lt'
+        if self.order_field == '_id':
+            return {'_id': {op: object_id}}
+        return {'$or': [
+            {self.order_field: {op: position}},
+            {self.order_field: position, '_id': {op: object_id}},
+        ]}
+
+    def page_query(self, request, filters):
+        """Return ``(query, sort, limit, cursor)`` for the page ``request`` asks for."""
+        query = to_mongo_filter(filters)
+        token = request.GET.get('cursor')
+        cursor = self.decode_cursor(token) if token else None
+
+        direction = self.direction
+        if cursor:
+            if cursor[2]:
+                direction = -direction
+            seek = self.seek(cursor[0], cursor[1], direction)
+            query = {'$and': [query, seek]} if query else seek
+        sort = [(self.order_field, direction)]
+        if self.order_field != '_id':
+            sort.append(('_id', direction))
+        # One extra document tells whether there is a page beyond this one
+        return query, sort, self.get_page_size(request) + 1, cursor
+
+    def page_envelope(self, request, documents, cursor, page_size):
+        has_more = len(documents) > page_size
+        documents = documents[:page_size]
+        if cursor and cursor[2]:
+            documents.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        url = request.build_absolute_uri()
+        next_url = previous_url = None
+        if documents and has_next:
+            next_url = replace_query_param(url, 'cursor', self.encode_cursor(documents[-1], False))
+        if documents and has_previous:
+            previous_url = replace_query_param(url, 'cursor', self.encode_cursor(documents[0], True))
+        return {
+            'next': next_url,
+            'previous': previous_url,
+            'results': self.serialize(documents),
+        }
+
+
+@lru_cache(maxsize=None)
+def repository_for(model, serializer_class, pagination_class=KeysetPagination, ordering=None, fields=None):
+    return Repository(model, serializer_class, pagination_class, ordering, fields)
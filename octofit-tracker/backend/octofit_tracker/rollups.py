@@ -0,0 +1,178 @@
+"""Daily, weekly, monthly and all-time activity totals per user.
+
+Activity writes ``$inc`` the four rollup rows they fall into; ``rebuild``
+backfills the whole store from history with one aggregation per bucket.
+Periods start at midnight UTC, weeks on Monday; the single ``all`` row per
+user starts at the epoch.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from pymongo import ReplaceOne, UpdateOne
+
+from . import caching
+from .models import Activity, ActivityRollup
+from .mongo import get_collection
+
+BUCKETS = ('day', 'week', 'month', 'all')
+ALL_TIME = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def period_starts(date):
+    if isinstance(date, str):
+        date = parse_datetime(date)
+    if timezone.is_naive(date):
+        date = date.replace(tzinfo=dt_timezone.utc)
+    day = date.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'day': day,
+        'week': day - timedelta(days=day.weekday()),
+        'month': day.replace(day=1),
+        'all': ALL_TIME,
+    }
+
+
+def apply_activities(activities, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) activities from their rollup rows."""
+    increments = defaultdict(lambda: defaultdict(int))
+    for activity in activities:
+        for bucket, period_start in period_starts(activity['date']).items():
+            inc = increments[(activity['user_email'], bucket, period_start)]
+            inc['total_calories'] += sign * activity['calories']
+            inc['total_duration'] += sign * activity['duration']
+            inc['total_distance'] += sign * (activity.get('distance') or 0)
+            inc['activity_count'] += sign
+            inc[f'activity_types.{activity["activity_type"]}'] += sign
+    if not increments:
+        return
+
+    now = timezone.now()
+    get_collection(ActivityRollup).bulk_write([
+        UpdateOne(
+            {'user_email': user_email, 'bucket': bucket, 'period_start': period_start},
+            {'$inc': dict(inc), '$set': {'updated_at': now}},
+            upsert=True,
+        )
+        for (user_email, bucket, period_start), inc in increments.items()
+    ], ordered=False)
+    for user_email in {user_email for user_email, _, _ in increments}:
+        caching.invalidate(ActivityRollup, scope=user_email)
+
+
+def _rebuild_pipeline(bucket, match):
+    trunc = {'date': '$date', 'unit': bucket, 'timezone': 'UTC'}
+    if bucket == 'week':
+        trunc['startOfWeek'] = 'monday'
+    period_start = {'$literal': ALL_TIME} if bucket == 'all' else {'$dateTrunc': trunc}
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': {
+                'user_email': '$user_email',
+                'period_start': period_start,
+                'activity_type': '$activity_type',
+            },
+            'total_calories': {'$sum': '$calories'},
+            'total_duration': {'$sum': '$duration'},
+            'total_distance': {'$sum': {'$ifNull': ['$distance', 0]}},
+            'activity_count': {'$sum': 1},
+        }},
+        {'$group': {
+            '_id': {'user_email': '$_id.user_email', 'period_start': '$_id.period_start'},
+            'total_calories': {'$sum': '$total_calories'},
+            'total_duration': {'$sum': '$total_duration'},
+            'total_distance': {'$sum': '$total_distance'},
+            'activity_count': {'$sum': '$activity_count'},
+            'activity_types': {'$push': {'k': '$_id.activity_type', 'v': '$activity_count'}},
+        }},
+    ]
+
+
+def rebuild(user_email=None, batch_size=1000):
+    """Recompute rollups from the activity history, optionally for one user.
+
+    Rows are replaced in place and stale ones removed afterwards, so readers
+    never see an empty store. Returns the number of rollup rows written.
+    """
+    match = {'user_email': user_email} if user_email else {}
+    started = timezone.now()
+    rollups = get_collection(ActivityRollup)
+    activities = get_collection(Activity)
+    written = 0
+
+    for bucket in BUCKETS:
+        requests = []
+        for row in activities.aggregate(_rebuild_pipeline(bucket, match), allowDiskUse=True):
+            key = {**row['_id'], 'bucket': bucket}
+            requests.append(ReplaceOne(key, {
+                **key,
+                'total_calories': row['total_calories'],
+                'total_duration': row['total_duration'],
+                'total_distance': row['total_distance'],
+                'activity_count': row['activity_count'],
+                'activity_types': {item['k']: item['v'] for item in row['activity_types']},
+                'updated_at': started,
+            }, upsert=True))
+            if len(requests) >= batch_size:
+                rollups.bulk_write(requests, ordered=False)
+                written += len(requests)
+                requests = []
+        if requests:
+            rollups.bulk_write(requests, ordered=False)
+            written += len(requests)
+
+    rollups.delete_many({**match, 'updated_at': {'$lt': started}})
+    if user_email:
+        caching.invalidate(ActivityRollup, scope=user_email)
+    else:
+        caching.invalidate(ActivityRollup)
+    return written
+
+
+def current_streak(user_email, today=None):
+    """Consecutive active days up to today, or up to yesterday if nothing is logged today yet.
+
+    Reads the user's day rows newest first and stops at the first gap, so the
+    cost depends on the streak, not the length of the history.
+    """
+    day = period_starts(today or timezone.now())['day']
+    rows = get_collection(ActivityRollup).find(
+        {'user_email': user_email, 'bucket': 'day', 'period_start': {'$lte': day}, 'activity_count': {'$gt': 0}},
+        {'period_start': 1},
+        sort=[('period_start', -1)],
+        batch_size=32,
+    )
+    streak = 0
+    try:
+        for row in rows:
+            period_start = period_starts(row['period_start'])['day']
+            if streak == 0 and period_start == day - timedelta(days=1):
+                day = period_start
+            if period_start != day:
+                break
+            streak += 1
+            day -= timedelta(days=1)
+    finally:
+        rows.close()
+    return streak
+
+
+def user_summary(user_email, today=None):
+    """All-time totals, favorite activity type and current streak for one user."""
+    row = get_collection(ActivityRollup).find_one(
+        {'user_email': user_email, 'bucket': 'all', 'period_start': ALL_TIME},
+    ) or {}
+    activity_types = {name: count for name, count in row.get('activity_types', {}).items() if count > 0}
+    return {
+        'user_email': user_email,
+        'total_calories': row.get('total_calories', 0),
+        'total_duration': row.get('total_duration', 0),
+        'total_distance': row.get('total_distance', 0),
+        'activity_count': row.get('activity_count', 0),
+        'activity_types': activity_types,
+        # Ties go to the alphabetically first type so the answer is stable
+        'favorite_activity_type': min(activity_types, key=lambda name: (-activity_types[name], name), default=None),
+        'current_streak': current_streak(user_email, today),
+    }
@@ -1,63 +1,187 @@
-from rest_framework import serializers
-from .models import User, Team, Activity, Leaderboard, Workout
+from datetime import timezone
+from functools import lru_cache
+from types import SimpleNamespace
 
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.db.models import Field as ModelFieldBase
+from django.utils.encoding import is_protected_type
+from djongo.models.fields import GenericObjectIdField
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .credentials import hash_password
+from .models import User, Team, Activity, ActivityRollup, Leaderboard, TeamStanding, Workout
 
-class UserSerializer(serializers.ModelSerializer):
+
+class ObjectIdField(serializers.Field):
+    """Keeps ``ObjectId`` values as they are; the JSON renderer writes them as strings."""
+    default_error_messages = {
+        'invalid': 'Must be a valid ObjectId.',
+    }
+    
+    def to_representation(self, value):
+        return value
+    
+    def to_internal_value(self, data):
+        try:
+            return ObjectId(data)
+        except (InvalidId, TypeError):
+            self.fail('invalid')
+
+
+class DocumentSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        GenericObjectIdField: ObjectIdField,
+    }
+
+
+class UserSerializer(DocumentSerializer):
     class Meta:
         model = User
         fields = ['_id', 'name', 'email', 'password', 'team', 'created_at']
-        extra_kwargs = {'password': {'write_only': True}}
+        # Membership changes go through the team join/move/leave actions,
+        # which keep User.team and Team.members in step
+        extra_kwargs = {'password': {'write_only': True}, 'team': {'read_only': True}}
     
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        if representation.get('_id'):
-            representation['_id'] = str(representation['_id'])
-        return representation
+    def validate_password(self, value):
+        return hash_password(value)
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(DocumentSerializer):
     class Meta:
         model = Team
         fields = ['_id', 'name', 'description', 'members', 'created_at']
-    
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        if representation.get('_id'):
-            representation['_id'] = str(representation['_id'])
-        return representation
+        read_only_fields = ['members']
 
 
-class ActivitySerializer(serializers.ModelSerializer):
+class ActivitySerializer(DocumentSerializer):
     class Meta:
         model = Activity
         fields = ['_id', 'user_email', 'activity_type', 'duration', 'calories', 'distance', 'date', 'notes']
-    
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        if representation.get('_id'):
-            representation['_id'] = str(representation['_id'])
-        return representation
 
 
-class LeaderboardSerializer(serializers.ModelSerializer):
+class LeaderboardSerializer(DocumentSerializer):
     class Meta:
         model = Leaderboard
         fields = ['_id', 'user_email', 'team', 'total_calories', 'total_activities', 'total_duration', 'rank', 'updated_at']
-    
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        if representation.get('_id'):
-            representation['_id'] = str(representation['_id'])
-        return representation
 
 
-class WorkoutSerializer(serializers.ModelSerializer):
+class TeamStandingSerializer(DocumentSerializer):
+    class Meta:
+        model = TeamStanding
+        fields = ['_id', 'team', 'total_calories', 'total_activities', 'total_duration', 'rank', 'updated_at']
+
+
+class WorkoutSerializer(DocumentSerializer):
     class Meta:
         model = Workout
         fields = ['_id', 'name', 'description', 'activity_type', 'difficulty', 'duration', 'calories_estimate', 'exercises']
+
+
+class ActivityRollupSerializer(serializers.ModelSerializer):
+    activity_types = serializers.JSONField(read_only=True)
     
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        if representation.get('_id'):
-            representation['_id'] = str(representation['_id'])
-        return representation
+    class Meta:
+        model = ActivityRollup
+        fields = ['user_email', 'bucket', 'period_start', 'total_calories', 'total_duration',
+                  'total_distance', 'activity_count', 'activity_types']
+        read_only_fields = fields
+
+
+def _utc_isoformat(value):
+    # Same output as DRF's DateTimeField for a UTC field timezone and the
+    # default ISO 8601 format.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    else:
+        value = value.astimezone(timezone.utc)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class RowSerializer:
+    """Read-only fast path that renders ``.values()`` rows like a ``ModelSerializer``.
+
+    Converters are resolved once per page from the serializer's declared
+    fields, so each row only costs one dict build instead of DRF's per-field
+    ``get_attribute``/``to_representation`` dispatch and a model instance.
+    ObjectIds are left as they are for the renderer. ``fields`` narrows the
+    output (and ``source_fields``) to the named fields.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.fields = [
+            (name, field) for name, field in serializer_class().fields.items()
+            if not field.write_only and (fields is None or name in fields)
+        ]
+        self.source_fields = [field.source for _, field in self.fields]
+
+    @staticmethod
+    def _converter(field):
+        # ``None`` keeps the stored value; the JSON renderer encodes it.
+        if isinstance(field, ObjectIdField):
+            return None
+        if isinstance(field, serializers.ModelField):
+            model_field = field.model_field
+            if type(model_field).value_to_string is ModelFieldBase.value_to_string:
+                return lambda value: value if is_protected_type(value) else str(value)
+            return lambda value: (
+                value if is_protected_type(value)
+                else model_field.value_to_string(SimpleNamespace(**{model_field.attname: value}))
+            )
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if output_format and output_format.lower() == ISO_8601 and str(field_timezone) == 'UTC':
+                return _utc_isoformat
+            return field.to_representation
+        if isinstance(field, serializers.CharField):
+            return str
+        if isinstance(field, serializers.IntegerField):
+            return int
+        if isinstance(field, serializers.FloatField):
+            return float
+        return field.to_representation
+
+    def to_representation(self, rows):
+        columns = [(name, field.source, self._converter(field)) for name, field in self.fields]
+        return [
+            {
+                name: value if (value := row.get(source)) is None or convert is None else convert(value)
+                for name, source, convert in columns
+            }
+            for row in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def row_serializer_for(serializer_class, fields=None):
+    return RowSerializer(serializer_class, fields)
+
+
+def select_fields(serializer_class, fields=None, exclude=None):
+    """Resolve comma-separated ``fields``/``exclude`` parameters to a field name tuple.
+
+    Returns ``None`` when neither narrows the output; raises ``ValueError``
+    for names the serializer doesn't render.
+    """
+    if not fields and not exclude:
+        return None
+    available = row_serializer_for(serializer_class).fields
+    names = [name for name, _ in available]
+    selected = set(names)
+    for param, value in (('fields', fields), ('exclude', exclude)):
+        if not value:
+            continue
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = requested - set(names)
+        if unknown:
+            raise ValueError(f'Unknown {param}: {", ".join(sorted(unknown))}; choose from {", ".join(names)}')
+        selected = selected & requested if param == 'fields' else selected - requested
+    if not selected:
+        raise ValueError('No fields left to return')
+    # Declaration order keeps one cached row serializer per field set
+    return tuple(name for name in names if name in selected)
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'octofit_tracker.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -86,18 +87,93 @@ WSGI_APPLICATION = 'octofit_tracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Pool and driver options are only passed to pymongo when their environment
+# variable is set, so unset ones keep the driver defaults.
+MONGO_CLIENT_OPTIONS = [
+    ('maxPoolSize', 'OCTOFIT_MONGO_MAX_POOL_SIZE', int),
+    ('minPoolSize', 'OCTOFIT_MONGO_MIN_POOL_SIZE', int),
+    ('maxIdleTimeMS', 'OCTOFIT_MONGO_MAX_IDLE_TIME_MS', int),
+    ('waitQueueTimeoutMS', 'OCTOFIT_MONGO_WAIT_QUEUE_TIMEOUT_MS', int),
+    ('serverSelectionTimeoutMS', 'OCTOFIT_MONGO_SERVER_SELECTION_TIMEOUT_MS', int),
+    ('connectTimeoutMS', 'OCTOFIT_MONGO_CONNECT_TIMEOUT_MS', int),
+    ('socketTimeoutMS', 'OCTOFIT_MONGO_SOCKET_TIMEOUT_MS', int),
+    ('compressors', 'OCTOFIT_MONGO_COMPRESSORS', str),  # e.g. zstd,zlib
+    ('readPreference', 'OCTOFIT_MONGO_READ_PREFERENCE', str),  # e.g. secondaryPreferred
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'djongo',
         'NAME': 'octofit_db',
         'ENFORCE_SCHEMA': False,
+        # Keep djongo's client between requests instead of reconnecting each time
+        'CONN_MAX_AGE': int(os.environ.get('OCTOFIT_CONN_MAX_AGE', 600)),
         'CLIENT': {
-            'host': 'localhost',
-            'port': 27017,
+            'host': os.environ.get('OCTOFIT_MONGO_HOST', 'localhost'),
+            'port': int(os.environ.get('OCTOFIT_MONGO_PORT', 27017)),
+            **{
+                option: cast(os.environ[variable])
+                for option, variable, cast in MONGO_CLIENT_OPTIONS
+                if variable in os.environ
+            },
         }
     }
 }
 
+# Open the MongoDB pool when a worker starts instead of on its first requests
+MONGO_WARMUP = os.environ.get('OCTOFIT_MONGO_WARMUP', '1') not in ('0', 'false')
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Response caching keeps its invalidation versions here, so it is only correct
+# when every process shares the cache. The LocMemCache default is private to
+# each process and suits runserver or a single worker only; with several
+# workers set a shared backend (e.g. Redis, Memcached or FileBasedCache with a
+# common directory). ``manage.py check --deploy`` warns while it is local.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('OCTOFIT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('OCTOFIT_CACHE_LOCATION', 'octofit'),
+    }
+}
+
+# Seconds a cached leaderboard/workout response is kept
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('OCTOFIT_RESPONSE_CACHE_TIMEOUT', 300))
+
+# Serve list, by_* and retrieve reads with pymongo instead of the ORM
+REPOSITORY_READS = os.environ.get('OCTOFIT_REPOSITORY_READS', '1') not in ('0', 'false')
+
+# Per-request MongoDB command counts and timings (Server-Timing header, slow
+# request log and /api/metrics/)
+INSTRUMENTATION_ENABLED = os.environ.get('OCTOFIT_INSTRUMENTATION', '1') not in ('0', 'false')
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('OCTOFIT_SLOW_REQUEST_MS', 500))
+
+# Background jobs (octofit_tracker.jobs, run by `manage.py run_jobs`)
+JOB_MAX_ATTEMPTS = int(os.environ.get('OCTOFIT_JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY_SECONDS = int(os.environ.get('OCTOFIT_JOB_RETRY_DELAY_SECONDS', 30))
+JOB_LEASE_SECONDS = int(os.environ.get('OCTOFIT_JOB_LEASE_SECONDS', 600))
+JOB_COALESCE_SECONDS = int(os.environ.get('OCTOFIT_JOB_COALESCE_SECONDS', 5))
+# Bulk ingests touching at least this many users queue a leaderboard rebuild
+# instead of updating ranks inline; 0 keeps them inline (no worker needed)
+BULK_RECOMPUTE_THRESHOLD = int(os.environ.get('OCTOFIT_BULK_RECOMPUTE_THRESHOLD', 0))
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.1/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    'octofit_tracker.credentials.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 work factor for new hashes; older hashes are upgraded on login
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('OCTOFIT_PASSWORD_HASH_ITERATIONS', 390000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -140,6 +216,16 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST framework
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'octofit_tracker.pagination.KeysetPagination',
+    # Swap in octofit_tracker.renderers.FastJSONRenderer (needs orjson) for faster rendering
+    'DEFAULT_RENDERER_CLASSES': [
+        'octofit_tracker.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_METHODS = [
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, leaderboard, rollups
+from .models import Activity, Leaderboard, TeamStanding, Workout
+
+TRACKED_FIELDS = ('user_email', 'activity_type', 'calories', 'duration', 'distance', 'date')
+
+
+def _snapshot(activity):
+    return {field: getattr(activity, field) for field in TRACKED_FIELDS}
+
+
+@receiver(pre_save, sender=Activity)
+def remember_previous_activity(sender, instance, **kwargs):
+    instance._previous_activity = None
+    if instance.pk and not leaderboard.is_paused():
+        instance._previous_activity = (
+            Activity.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Activity)
+def update_aggregates_on_save(sender, instance, raw=False, **kwargs):
+    if raw or leaderboard.is_paused():
+        return
+    previous = getattr(instance, '_previous_activity', None)
+    current = _snapshot(instance)
+    if previous is None:
+        leaderboard.record_activity(current)
+        rollups.apply_activities([current])
+        return
+    if previous != current:
+        rollups.apply_activities([previous], sign=-1)
+        rollups.apply_activities([current])
+    if previous['user_email'] != current['user_email']:
+        leaderboard.record_activity(previous, sign=-1)
+        leaderboard.record_activity(current)
+    else:
+        leaderboard.apply_delta(
+            current['user_email'],
+            calories=current['calories'] - previous['calories'],
+            duration=current['duration'] - previous['duration'],
+        )
+
+
+@receiver(post_delete, sender=Activity)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    if leaderboard.is_paused():
+        return
+    snapshot = _snapshot(instance)
+    leaderboard.record_activity(snapshot, sign=-1)
+    rollups.apply_activities([snapshot], sign=-1)
+
+
+@receiver(post_save, sender=Leaderboard)
+@receiver(post_delete, sender=Leaderboard)
+@receiver(post_save, sender=TeamStanding)
+@receiver(post_delete, sender=TeamStanding)
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def invalidate_cached_responses(sender, **kwargs):
+    caching.invalidate(sender)
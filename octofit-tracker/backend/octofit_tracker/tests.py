@@ -1,8 +1,20 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import User, Team, Activity, Leaderboard, Workout
-from datetime import datetime
+from .models import User, Team, Activity, ActivityRollup, Job, Leaderboard, Workout
+from . import instrumentation, jobs, renderers
+from .mongo import get_collection, pool_stats, warmup
+from .renderers import FastJSONRenderer, JSONRenderer
+from .serializers import ActivitySerializer, TeamSerializer
+from datetime import datetime, timezone
+from io import StringIO
+import gzip
+import json
+import os
+import tempfile
 
 
 class UserAPITestCase(TestCase):
@@ -25,7 +37,42 @@ class UserAPITestCase(TestCase):
         User.objects.create(**self.user_data)
         response = self.client.get('/api/users/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+    
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_password_is_hashed_and_upgraded_on_login(self):
+        self.client.post('/api/users/', self.user_data, format='json')
+        self.assertTrue(User.objects.get().password.startswith('pbkdf2_sha256$1000$'))
+        
+        credentials = {'email': 'test@example.com', 'password': 'testpass123'}
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post('/api/users/login/', credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'test@example.com')
+        self.assertNotIn('password', response.data)
+        self.assertTrue(User.objects.get().password.startswith('pbkdf2_sha256$2000$'))
+        
+        response = self.client.post('/api/users/login/', {**credentials, 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_import_users(self):
+        Team.objects.create(name='Test Team', members=[])
+        User.objects.create(name='Existing', email='a0@example.com', password='keep')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('name,email,password,team\n')
+            handle.writelines(f'User {i},a{i}@example.com,secret{i},Test Team\n' for i in range(100))
+            handle.write('No Email,,secret,\n')
+        self.addCleanup(os.unlink, handle.name)
+        call_command('import_users', handle.name, '--iterations', '500', '--workers', '2', stdout=StringIO())
+        
+        self.assertEqual(User.objects.count(), 100)
+        self.assertEqual(User.objects.get(email='a0@example.com').password, 'keep')
+        self.assertTrue(User.objects.get(email='a7@example.com').password.startswith('pbkdf2_sha256$500$'))
+        self.assertEqual(len(Team.objects.get().members), 99)
+        response = self.client.post('/api/users/login/', {'email': 'a7@example.com', 'password': 'secret7'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(email='a7@example.com').password.startswith('pbkdf2_sha256$1000$'))
 
 
 class TeamAPITestCase(TestCase):
@@ -47,7 +94,7 @@ class TeamAPITestCase(TestCase):
         Team.objects.create(**self.team_data)
         response = self.client.get('/api/teams/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 
 class ActivityAPITestCase(TestCase):
@@ -73,7 +120,7 @@ class ActivityAPITestCase(TestCase):
         Activity.objects.create(**self.activity_data)
         response = self.client.get('/api/activities/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 
 class LeaderboardAPITestCase(TestCase):
@@ -98,7 +145,7 @@ class LeaderboardAPITestCase(TestCase):
         Leaderboard.objects.create(**self.leaderboard_data)
         response = self.client.get('/api/leaderboard/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 
 class WorkoutAPITestCase(TestCase):
@@ -127,10 +174,670 @@ class WorkoutAPITestCase(TestCase):
         Workout.objects.create(**self.workout_data)
         response = self.client.get('/api/workouts/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
     
     def test_filter_by_difficulty(self):
         Workout.objects.create(**self.workout_data)
         response = self.client.get('/api/workouts/by_difficulty/?difficulty=Hard')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class LeaderboardEngineTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create(name='Alice', email='alice@example.com', password='pw', team='Team A')
+        User.objects.create(name='Bob', email='bob@example.com', password='pw', team='Team B')
+    
+    def post_activity(self, email, calories, duration=30):
+        return self.client.post('/api/activities/', {
+            'user_email': email,
+            'activity_type': 'Running',
+            'duration': duration,
+            'calories': calories,
+            'date': datetime.now(),
+        }, format='json')
+    
+    def ranks(self):
+        return list(Leaderboard.objects.order_by('rank').values_list('user_email', 'rank'))
+    
+    def test_activity_create_updates_totals(self):
+        self.post_activity('alice@example.com', 300, duration=40)
+        self.post_activity('alice@example.com', 200, duration=20)
+        entry = Leaderboard.objects.get(user_email='alice@example.com')
+        self.assertEqual(entry.team, 'Team A')
+        self.assertEqual(entry.total_calories, 500)
+        self.assertEqual(entry.total_duration, 60)
+        self.assertEqual(entry.total_activities, 2)
+        self.assertEqual(entry.rank, 1)
+    
+    def test_overtaking_moves_ranks(self):
+        self.post_activity('alice@example.com', 300)
+        self.post_activity('bob@example.com', 200)
+        self.assertEqual(self.ranks(), [('alice@example.com', 1), ('bob@example.com', 2)])
+        self.post_activity('bob@example.com', 200)
+        self.assertEqual(self.ranks(), [('bob@example.com', 1), ('alice@example.com', 2)])
+    
+    def test_update_and_delete_apply_delta(self):
+        self.post_activity('alice@example.com', 300)
+        response = self.post_activity('bob@example.com', 200)
+        activity_id = response.data['_id']
+        self.client.patch(f'/api/activities/{activity_id}/', {'calories': 500}, format='json')
+        self.assertEqual(self.ranks(), [('bob@example.com', 1), ('alice@example.com', 2)])
+        self.client.delete(f'/api/activities/{activity_id}/')
+        entry = Leaderboard.objects.get(user_email='bob@example.com')
+        self.assertEqual(entry.total_calories, 0)
+        self.assertEqual(entry.total_activities, 0)
+        self.assertEqual(self.ranks(), [('alice@example.com', 1), ('bob@example.com', 2)])
+
+
+class PaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_list_follows_cursor(self):
+        for i in range(3):
+            Workout.objects.create(
+                name=f'Workout {i}', description='', activity_type='Yoga',
+                difficulty='Easy', duration=20, calories_estimate=100,
+            )
+        response = self.client.get('/api/workouts/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+    
+    def test_leaderboard_pages_by_rank(self):
+        for rank in (3, 1, 2):
+            Leaderboard.objects.create(user_email=f'user{rank}@example.com', team='Team', rank=rank)
+        response = self.client.get('/api/leaderboard/by_team/?team=Team&page_size=2')
+        self.assertEqual([row['rank'] for row in response.data['results']], [1, 2])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['rank'] for row in response.data['results']], [3])
+
+
+class EnsureIndexesTestCase(TestCase):
+    def test_creates_declared_indexes(self):
+        call_command('ensure_indexes', stdout=StringIO())
+        index_keys = [info['key'] for info in get_collection(Activity).index_information().values()]
+        self.assertIn([('user_email', 1), ('date', 1)], index_keys)
+        call_command('ensure_indexes', '--check', stdout=StringIO())
+
+
+class RecomputeLeaderboardTestCase(TestCase):
+    def test_rebuild_from_activities(self):
+        User.objects.create(name='Alice', email='alice@example.com', password='pw', team='Team A')
+        User.objects.create(name='Bob', email='bob@example.com', password='pw', team='Team B')
+        for calories in (100, 250):
+            Activity.objects.create(
+                user_email='bob@example.com', activity_type='Yoga', duration=30,
+                calories=calories, date=datetime.now(),
+            )
+        Leaderboard.objects.all().delete()
+        call_command('recompute_leaderboard', stdout=StringIO())
+        rows = list(Leaderboard.objects.order_by('rank').values_list('user_email', 'team', 'total_calories', 'total_activities', 'rank'))
+        self.assertEqual(rows, [
+            ('bob@example.com', 'Team B', 350, 2, 1),
+            ('alice@example.com', 'Team A', 0, 0, 2),
+        ])
+
+
+class PopulateDbTestCase(TestCase):
+    def populate(self, *args):
+        call_command('populate_db', *args, stdout=StringIO())
+        return list(Activity.objects.order_by('user_email', 'calories').values_list(
+            'user_email', 'activity_type', 'duration', 'calories'))
+    
+    def test_heroes_by_default(self):
+        self.populate('--seed', '7')
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Activity.objects.count(), 50)
+        self.assertEqual(Leaderboard.objects.count(), 10)
+        self.assertEqual(len(Team.objects.get(name='Team Marvel').members), 5)
+    
+    def test_synthetic_dataset_is_deterministic(self):
+        args = ('--users', '12', '--teams', '3', '--activities-per-user', '4', '--seed', '42', '--batch-size', '5')
+        first = self.populate(*args)
+        self.assertEqual(len(first), 48)
+        self.assertEqual(Team.objects.count(), 3)
+        self.assertEqual(self.populate(*args), first)
+    
+    def test_upsert_keeps_existing_data(self):
+        args = ('--upsert', '--users', '6', '--teams', '2', '--activities-per-user', '2', '--seed', '3')
+        first = self.populate(*args)
+        self.assertEqual(len(first), 12)
+        User.objects.create(name='Real User', email='real@example.com', password='testpass123')
+        
+        self.assertEqual(self.populate(*args), first)
+        self.assertTrue(User.objects.filter(email='real@example.com').exists())
+        self.assertEqual(Workout.objects.count(), len(set(Workout.objects.values_list('name', flat=True))))
+        
+        self.populate('--upsert', '--users', '8', '--teams', '2', '--activities-per-user', '2', '--seed', '3')
+        self.assertEqual(User.objects.count(), 9)
+        self.assertEqual(Activity.objects.count(), 16)
+        self.assertEqual(Leaderboard.objects.count(), 9)
+    
+    def test_upsert_without_seed_keeps_users_and_team_moves(self):
+        args = ('--upsert', '--users', '4', '--teams', '2', '--activities-per-user', '1')
+        self.populate(*args)
+        user = User.objects.get(email='athlete0@octofit.test')
+        moved_to = next(name for name in Team.objects.values_list('name', flat=True) if name != user.team)
+        User.objects.filter(pk=user.pk).update(team=moved_to)
+        old_team = Team.objects.get(name=user.team)
+        old_team.members = [email for email in old_team.members if email != user.email]
+        old_team.save()
+        
+        self.populate(*args)
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(Activity.objects.count(), 4)
+        self.assertEqual(User.objects.get(email='athlete0@octofit.test').team, moved_to)
+        self.assertNotIn('athlete0@octofit.test', Team.objects.get(name=user.team).members)
+
+
+class ActivityBulkTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.activities = [
+            {'user_email': 'test@example.com', 'activity_type': 'Running', 'duration': 30,
+             'calories': 300, 'date': '2026-01-01T07:00:00Z'},
+            {'user_email': 'test@example.com', 'activity_type': 'Yoga', 'duration': 45,
+             'calories': 150, 'date': '2026-01-02T07:00:00Z'},
+        ]
+    
+    def test_bulk_create_is_idempotent(self):
+        response = self.client.post('/api/activities/bulk/', self.activities, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        response = self.client.post('/api/activities/bulk/', self.activities, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['duplicate'], 2)
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertEqual(Leaderboard.objects.get(user_email='test@example.com').total_calories, 450)
+    
+    def test_bulk_ndjson_reports_invalid_items(self):
+        body = '\n'.join(json.dumps(item) for item in self.activities + [{'user_email': 'not-an-email'}])
+        response = self.client.post('/api/activities/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created', 'invalid'])
+        self.assertEqual(Activity.objects.count(), 2)
+    
+    def test_bulk_rejects_activity_types_unusable_as_field_names(self):
+        items = [{**self.activities[0], 'activity_type': name} for name in ('Trail.Run', '$inc')]
+        response = self.client.post('/api/activities/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIn('activity_type', response.data['results'][0]['errors'])
+        self.assertEqual(response.data['invalid'], 2)
+        self.assertFalse(ActivityRollup.objects.exists())
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Leaderboard.objects.create(user_email='test@example.com', team='Test Team', rank=1)
+    
+    def test_etag_revalidation_and_invalidation(self):
+        response = self.client.get('/api/leaderboard/')
+        etag = response['ETag']
+        response = self.client.get('/api/leaderboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Leaderboard.objects.create(user_email='other@example.com', team='Test Team', rank=2)
+        response = self.client.get('/api/leaderboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class FastListRepresentationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_activity_list_matches_model_serializer(self):
+        activity = Activity.objects.create(
+            user_email='test@example.com', activity_type='Running', duration=30,
+            calories=300, distance=5.5, date=datetime.now(), notes='Morning run',
+        )
+        response = self.client.get('/api/activities/')
+        self.assertEqual(response.data['results'], [ActivitySerializer(Activity.objects.get(pk=activity.pk)).data])
+    
+    def test_team_list_matches_model_serializer(self):
+        Team.objects.create(name='Test Team', description='A test team', members=['a@example.com'])
+        response = self.client.get('/api/teams/by_name/?name=Test Team')
+        self.assertEqual(response.data['results'], [TeamSerializer(Team.objects.get()).data])
+    
+    def test_renderers_write_object_ids_as_strings(self):
+        team = Team.objects.create(name='Test Team', description='A test team', members=[])
+        response = self.client.get('/api/teams/')
+        self.assertEqual(response.data['results'][0]['_id'], team._id)
+        self.assertEqual(json.loads(response.content)['results'][0]['_id'], str(team._id))
+        
+        data = {'_id': team._id, 'taken_at': datetime(2026, 1, 2, 3, 4, 5)}
+        expected = {'_id': str(team._id), 'taken_at': '2026-01-02T03:04:05Z'}
+        self.assertEqual(json.loads(JSONRenderer().render(data)), expected)
+        if renderers.orjson is not None:
+            self.assertEqual(json.loads(FastJSONRenderer().render(data)), expected)
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for email in ('alice@example.com', 'bob@example.com'):
+            Activity.objects.create(
+                user_email=email, activity_type='Running', duration=30,
+                calories=300, date=datetime.now(), notes='Morning run',
+            )
+    
+    def test_export_activities_ndjson(self):
+        response = self.client.get('/api/activities/export/?user_email=alice@example.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['user_email'] for line in lines], ['alice@example.com'])
+    
+    def test_export_leaderboard_csv_gzip(self):
+        response = self.client.get('/api/leaderboard/export/?output=csv&gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertTrue(rows[0].startswith('_id,user_email,team'))
+        self.assertEqual(len(rows), 3)
+
+
+class TeamMembershipTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.red = Team.objects.create(name='Red', description='', members=[])
+        self.blue = Team.objects.create(name='Blue', description='', members=[])
+        User.objects.create(name='Alice', email='alice@example.com', password='pw')
+    
+    def test_join_move_and_leave(self):
+        response = self.client.post(f'/api/teams/{self.red._id}/join/', {'email': 'alice@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['member_count'], 1)
+        self.assertEqual(User.objects.get().team, 'Red')
+        
+        response = self.client.post(f'/api/teams/{self.blue._id}/join/', {'email': 'alice@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        
+        self.client.post(f'/api/teams/{self.blue._id}/move/', {'email': 'alice@example.com'}, format='json')
+        self.assertEqual(User.objects.get().team, 'Blue')
+        self.assertEqual(Team.objects.get(name='Red').members, [])
+        self.assertEqual(Team.objects.get(name='Blue').members, ['alice@example.com'])
+        
+        self.client.post(f'/api/teams/{self.blue._id}/leave/', {'email': 'alice@example.com'}, format='json')
+        self.assertIsNone(User.objects.get().team)
+        response = self.client.get(f'/api/teams/{self.blue._id}/member_count/')
+        self.assertEqual(response.data['member_count'], 0)
+    
+    def test_team_and_members_are_read_only(self):
+        user = User.objects.get()
+        self.client.patch(f'/api/users/{user._id}/', {'team': 'Red'}, format='json')
+        self.client.patch(f'/api/teams/{self.red._id}/', {'members': ['alice@example.com']}, format='json')
+        self.assertIsNone(User.objects.get().team)
+        self.assertEqual(Team.objects.get(name='Red').members, [])
+    
+    def test_unknown_user(self):
+        response = self.client.post(f'/api/teams/{self.red._id}/join/', {'email': 'nobody@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ActivityRollupTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for day, calories in ((5, 300), (6, 200), (14, 100)):
+            self.client.post('/api/activities/', {
+                'user_email': 'test@example.com', 'activity_type': 'Running', 'duration': 30,
+                'calories': calories, 'distance': 5.0, 'date': f'2026-01-{day:02d}T08:00:00Z',
+            }, format='json')
+    
+    def test_weekly_summary_is_maintained_on_write(self):
+        response = self.client.get('/api/activities/summary/?user_email=test@example.com&bucket=week')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['period_start'], row['total_calories'], row['activity_count']) for row in response.data],
+            [('2026-01-05T00:00:00Z', 500, 2), ('2026-01-12T00:00:00Z', 100, 1)],
+        )
+        self.assertEqual(response.data[0]['activity_types'], {'Running': 2})
+    
+    def test_backfill_matches_incremental(self):
+        before = self.client.get('/api/activities/summary/?user_email=test@example.com&bucket=day').data
+        ActivityRollup.objects.all().delete()
+        call_command('backfill_rollups', stdout=StringIO())
+        response = self.client.get('/api/activities/summary/?user_email=test@example.com&bucket=day&since=2026-01-06')
+        self.assertEqual(response.data, before[1:])
+    
+    def test_user_summary(self):
+        user = User.objects.create(name='Test User', email='test@example.com', password='unused')
+        url = f'/api/users/{user._id}/summary/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_calories'], 600)
+        self.assertEqual(response.data['activity_count'], 3)
+        self.assertEqual(response.data['favorite_activity_type'], 'Running')
+        self.assertEqual(response.data['current_streak'], 0)
+        
+        self.client.post('/api/activities/', {
+            'user_email': 'test@example.com', 'activity_type': 'Yoga', 'duration': 60,
+            'calories': 150, 'date': datetime.now(timezone.utc).isoformat(),
+        }, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_calories'], 750)
+        self.assertEqual(response.data['activity_types'], {'Running': 3, 'Yoga': 1})
+        self.assertEqual(response.data['current_streak'], 1)
+        
+        ActivityRollup.objects.all().delete()
+        call_command('backfill_rollups', stdout=StringIO())
+        self.assertEqual(self.client.get(url).data, response.data)
+        self.assertEqual(self.client.get('/api/users/invalid/summary/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncReadTestCase(TestCase):
+    def setUp(self):
+        for name in ('Push-ups', 'Plank', 'Squats'):
+            Workout.objects.create(name=name, description=name, activity_type='Strength',
+                                   duration=10, difficulty='Easy', calories_estimate=50)
+    
+    async def test_list_and_filter_match_sync_api(self):
+        sync = await sync_to_async(APIClient().get)('/api/workouts/?page_size=2')
+        response = await self.async_client.get('/api/async/workouts/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(data['results'], json.loads(json.dumps(sync.data['results'])))
+        
+        response = await self.async_client.get(data['next'])
+        self.assertEqual([workout['name'] for workout in json.loads(response.content)['results']], ['Squats'])
+        
+        response = await self.async_client.get('/api/async/workouts/by_difficulty/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BenchmarkTestCase(TestCase):
+    def test_benchmark_writes_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark', seed_users=20, teams=2, activities_per_user=2, requests=4, concurrency=2, warmup=0,
+                endpoints=['users-by-email', 'activities-create', 'leaderboard-list'], output=output, stdout=StringIO(),
+            )
+            with open(output) as stream:
+                results = json.load(stream)
+        self.assertEqual(set(results['endpoints']), {'users-by-email', 'activities-create', 'leaderboard-list'})
+        for stats in results['endpoints'].values():
+            self.assertEqual(stats['requests'], 4)
+            self.assertEqual(stats['errors'], {})
+            self.assertGreater(stats['mongo_commands_per_request'], 0)
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        instrumentation.reset_metrics()
+        User.objects.create(name='Test User', email='test@example.com', password='testpass123')
+    
+    def test_server_timing_and_metrics(self):
+        response = self.client.get('/api/users/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries", serialize;dur=[\d.]+, total;dur=[\d.]+$')
+        
+        metrics = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('octofit_request_duration_seconds_count{view="user-list",method="GET"} 1', metrics)
+    
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_are_logged_with_commands(self):
+        with self.assertLogs('octofit_tracker.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/users/by_email/?email=test@example.com')
+        self.assertIn('test@example.com', logs.output[0])
+
+
+class RepositoryReadsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for day in (1, 2, 3):
+            Activity.objects.create(
+                user_email='test@example.com', activity_type='Running', duration=30, calories=300,
+                distance=5.0, date=datetime(2026, 1, day, tzinfo=timezone.utc),
+            )
+    
+    def test_matches_orm_reads(self):
+        activity = Activity.objects.first()
+        for path in (
+            '/api/activities/', '/api/activities/by_user/?user_email=test@example.com',
+            f'/api/activities/{activity._id}/',
+        ):
+            response = self.client.get(path)
+            with override_settings(REPOSITORY_READS=False):
+                expected = self.client.get(path)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+    
+    def test_pages_through_equal_dates(self):
+        Activity.objects.create(
+            user_email='test@example.com', activity_type='Yoga', duration=30, calories=100,
+            date=datetime(2026, 1, 2, tzinfo=timezone.utc),
+        )
+        seen = []
+        url = '/api/activities/?page_size=1'
+        while url:
+            response = self.client.get(url)
+            seen.extend(str(row['_id']) for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(str(activity._id) for activity in Activity.objects.all()))
+        
+        response = self.client.get('/api/activities/?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ActivityFilterTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for day, activity_type, duration in ((1, 'Running', 30), (3, 'Yoga', 60), (5, 'Running', 45), (7, 'Cycling', 90)):
+            Activity.objects.create(
+                user_email='test@example.com', activity_type=activity_type, duration=duration,
+                calories=duration * 10, date=datetime(2026, 1, day, tzinfo=timezone.utc),
+            )
+    
+    def test_range_type_and_ordering(self):
+        response = self.client.get(
+            '/api/activities/by_user/?user_email=test@example.com&since=2026-01-02&until=2026-01-07'
+            '&activity_type=Running,Cycling&ordering=date'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['duration'] for row in response.data['results']], [45, 90])
+        
+        response = self.client.get('/api/activities/?min_duration=40&max_calories=600')
+        self.assertEqual([row['duration'] for row in response.data['results']], [45, 60])
+    
+    def test_date_only_until_includes_the_whole_day(self):
+        Activity.objects.create(
+            user_email='test@example.com', activity_type='Yoga', duration=20,
+            calories=200, date=datetime(2026, 1, 7, 18, tzinfo=timezone.utc),
+        )
+        response = self.client.get('/api/activities/?since=2026-01-06&until=2026-01-07&ordering=date')
+        self.assertEqual([row['duration'] for row in response.data['results']], [90, 20])
+        response = self.client.get('/api/activities/?since=2026-01-06&until=2026-01-07T12:00:00Z')
+        self.assertEqual([row['duration'] for row in response.data['results']], [90])
+    
+    def test_orm_fallback_applies_the_same_filters(self):
+        path = '/api/activities/?since=2026-01-03&activity_type=Running&ordering=date'
+        with override_settings(REPOSITORY_READS=False):
+            response = self.client.get(path)
+        self.assertEqual([row['duration'] for row in response.data['results']], [45])
+    
+    def test_invalid_parameters(self):
+        for query in ('since=yesterday', 'min_duration=long', 'ordering=calories'):
+            response = self.client.get(f'/api/activities/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TeamStandingsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for email, team in (('red1@example.com', 'Red'), ('red2@example.com', 'Red'), ('blue@example.com', 'Blue')):
+            User.objects.create(name=email, email=email, password='testpass123', team=team)
+    
+    def log(self, email, calories):
+        self.client.post('/api/activities/', {
+            'user_email': email, 'activity_type': 'Running', 'duration': 30,
+            'calories': calories, 'date': '2026-01-05T08:00:00Z',
+        }, format='json')
+    
+    def test_standings_follow_user_totals(self):
+        self.log('red1@example.com', 200)
+        self.log('blue@example.com', 300)
+        self.log('red2@example.com', 150)
+        response = self.client.get('/api/team-standings/')
+        self.assertEqual(
+            [(row['team'], row['total_calories'], row['rank']) for row in response.data['results']],
+            [('Red', 350, 1), ('Blue', 300, 2)],
+        )
+        response = self.client.post('/api/team-standings/', {'team': 'Green'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    def test_rank_change_since_snapshot(self):
+        self.log('red1@example.com', 200)
+        self.log('blue@example.com', 100)
+        call_command('snapshot_leaderboard', stdout=StringIO())
+        self.log('blue@example.com', 300)
+        
+        response = self.client.get('/api/leaderboard/rank_change/?user_email=blue@example.com&since=2100-01-01')
+        self.assertEqual((response.data['rank'], response.data['previous_rank'], response.data['change']), (1, 2, 1))
+        response = self.client.get('/api/team-standings/rank_change/?team=Red&since=2100-01-01')
+        self.assertEqual((response.data['rank'], response.data['previous_rank'], response.data['change']), (2, 1, -1))
+        response = self.client.get('/api/team-standings/rank_change/?team=Red')
+        self.assertIsNone(response.data['previous_rank'])
+
+
+class LeaderboardWindowTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for rank in range(1, 11):
+            Leaderboard.objects.create(
+                user_email=f'user{rank}@example.com', team='Odd' if rank % 2 else 'Even',
+                total_calories=1000 - rank, rank=rank,
+            )
+    
+    def test_top_k(self):
+        response = self.client.get('/api/leaderboard/top/?k=3')
+        self.assertEqual([row['rank'] for row in response.data['results']], [1, 2, 3])
+        response = self.client.get('/api/leaderboard/top/?k=2&team=Even')
+        self.assertEqual([row['rank'] for row in response.data['results']], [2, 4])
+    
+    def test_around_user(self):
+        response = self.client.get('/api/leaderboard/around/?user_email=user2@example.com&n=2')
+        self.assertEqual(response.data['rank'], 2)
+        self.assertEqual([row['rank'] for row in response.data['results']], [1, 2, 3, 4])
+        response = self.client.get('/api/leaderboard/around/?user_email=user5@example.com&n=1&scope=team')
+        self.assertEqual([row['rank'] for row in response.data['results']], [3, 5, 7])
+        response = self.client.get('/api/leaderboard/around/?user_email=nobody@example.com')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConnectionPoolTestCase(TestCase):
+    def test_warmup_opens_connections_reported_in_metrics(self):
+        warmup(size=2)
+        stats = pool_stats.snapshot()
+        self.assertTrue(stats)
+        self.assertTrue(all(counts['open'] >= 1 for counts in stats.values()))
+        
+        metrics = APIClient().get('/api/metrics/').content.decode()
+        self.assertIn('octofit_mongo_pool_checked_out{address=', metrics)
+        self.assertIn('octofit_mongo_pool_created_total{address=', metrics)
+
+
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.attempts = 0
+        
+        def flaky():
+            self.attempts += 1
+            if self.attempts == 1:
+                raise RuntimeError('transient')
+        
+        jobs.TASKS['test_flaky'] = flaky
+        self.addCleanup(jobs.TASKS.pop, 'test_flaky')
+    
+    def test_identical_pending_jobs_are_deduplicated(self):
+        first = jobs.enqueue('rebuild_rollups', user_email='a@example.com')
+        self.assertEqual(jobs.enqueue('rebuild_rollups', user_email='a@example.com'), first)
+        self.assertNotEqual(jobs.enqueue('rebuild_rollups', user_email='b@example.com'), first)
+        self.assertEqual(Job.objects.count(), 2)
+    
+    @override_settings(JOB_RETRY_DELAY_SECONDS=0)
+    def test_failed_jobs_are_retried(self):
+        jobs.enqueue('test_flaky')
+        self.assertEqual(jobs.work(burst=True), 2)
+        self.assertEqual(self.attempts, 2)
+        self.assertEqual(Job.objects.count(), 0)
+        
+        jobs.enqueue('test_flaky', max_attempts=1)
+        self.attempts = 0
+        jobs.work(burst=True)
+        self.assertEqual(Job.objects.get().status, jobs.FAILED)
+    
+    @override_settings(JOB_RETRY_DELAY_SECONDS=0)
+    def test_retry_folds_into_the_same_job_enqueued_while_running(self):
+        def requeued_then_fails():
+            self.attempts += 1
+            if self.attempts == 1:
+                jobs.enqueue('test_requeued')
+                raise RuntimeError('transient')
+        
+        jobs.TASKS['test_requeued'] = requeued_then_fails
+        self.addCleanup(jobs.TASKS.pop, 'test_requeued')
+        jobs.enqueue('test_requeued')
+        self.assertEqual(jobs.work(burst=True), 2)
+        self.assertEqual(self.attempts, 2)
+        self.assertEqual(Job.objects.count(), 0)
+    
+    @override_settings(BULK_RECOMPUTE_THRESHOLD=2, JOB_COALESCE_SECONDS=0)
+    def test_bulk_ingest_burst_queues_one_rebuild(self):
+        for day in range(1, 4):
+            self.client.post('/api/activities/bulk/', [
+                {'user_email': email, 'activity_type': 'Running', 'duration': 30,
+                 'calories': 100 * day, 'date': f'2026-01-0{day}T07:00:00Z'}
+                for email in ('alice@example.com', 'bob@example.com')
+            ], format='json')
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(Leaderboard.objects.count(), 0)
+        
+        call_command('run_jobs', '--burst', stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 0)
+        self.assertEqual(Leaderboard.objects.get(user_email='alice@example.com').total_calories, 600)
+
+
+class SparseFieldsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for day in (1, 2, 3):
+            Activity.objects.create(
+                user_email='test@example.com', activity_type='Running', duration=30, calories=100 * day,
+                date=datetime(2026, 1, day, tzinfo=timezone.utc), notes='A long note',
+            )
+    
+    def test_fields_and_exclude_narrow_rows(self):
+        for reads in (True, False):
+            with override_settings(REPOSITORY_READS=reads):
+                response = self.client.get('/api/activities/?fields=calories,date&page_size=2')
+                self.assertEqual([set(row) for row in response.data['results']], [{'calories', 'date'}] * 2)
+                response = self.client.get(response.data['next'])
+                self.assertEqual([row['calories'] for row in response.data['results']], [100])
+                
+                response = self.client.get('/api/activities/?exclude=notes,_id')
+                self.assertNotIn('notes', response.data['results'][0])
+                self.assertIn('user_email', response.data['results'][0])
+                
+                activity = Activity.objects.first()
+                response = self.client.get(f'/api/activities/{activity._id}/?fields=notes')
+                self.assertEqual(response.data, {'notes': 'A long note'})
+    
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/activities/?fields=calories,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/users/?fields=password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_fields(self):
+        response = self.client.get('/api/activities/export/?user_email=test@example.com&output=csv&fields=calories')
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), ['calories', '100', '200', '300'])
@@ -20,13 +20,15 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
-from .views import UserViewSet, TeamViewSet, ActivityViewSet, LeaderboardViewSet, WorkoutViewSet
+from . import async_views, instrumentation
+from .views import UserViewSet, TeamViewSet, ActivityViewSet, LeaderboardViewSet, TeamStandingViewSet, WorkoutViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'teams', TeamViewSet)
 router.register(r'activities', ActivityViewSet)
 router.register(r'leaderboard', LeaderboardViewSet)
+router.register(r'team-standings', TeamStandingViewSet)
 router.register(r'workouts', WorkoutViewSet)
 
 
@@ -43,6 +45,7 @@ def api_root(request, format=None):
         'teams': f"{base_url}/api/teams/",
         'activities': f"{base_url}/api/activities/",
         'leaderboard': f"{base_url}/api/leaderboard/",
+        'team_standings': f"{base_url}/api/team-standings/",
         'workouts': f"{base_url}/api/workouts/",
         'base_url': base_url
     })
@@ -52,5 +55,7 @@ urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', admin.site.urls),
     path('api/', api_root, name='api-root'),
+    path('api/async/', include(async_views.urlpatterns)),
+    path('api/metrics/', instrumentation.metrics_view, name='metrics'),
     path('api/', include(router.urls)),
 ]
@@ -1,11 +1,142 @@
-from rest_framework import viewsets
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from .models import User, Team, Activity, Leaderboard, Workout
-from .serializers import UserSerializer, TeamSerializer, ActivitySerializer, LeaderboardSerializer, WorkoutSerializer
+from . import credentials, instrumentation, leaderboard, membership, rollups
+from .caching import cached_response
+from .exports import export_response
+from .ingest import insert_activities
+from .models import User, Team, Activity, ActivityRollup, Leaderboard, TeamStanding, Workout
+from .mongo import get_collection
+from .pagination import ActivityPagination, LeaderboardPagination, with_tiebreak
+from .repositories import InvalidCursor, repository_for
+from .parsers import NDJSONParser
+from .rollups import BUCKETS
+from .serializers import UserSerializer, TeamSerializer, ActivitySerializer, LeaderboardSerializer, TeamStandingSerializer, WorkoutSerializer, ActivityRollupSerializer, row_serializer_for, select_fields
+
+
+def parse_when(value):
+    """Parse an ISO 8601 datetime, or a date meaning its midnight UTC; ``None`` if invalid."""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def range_lookups(params, field):
+    """ORM lookups on ``field`` for the ``since``/``until`` parameters; raises ``ValueError`` if invalid.
 
+    A date-only ``until`` takes in that whole day.
+    """
+    lookups = {}
+    for param, lookup in (('since', 'gte'), ('until', 'lte')):
+        value = params.get(param, None)
+        if value:
+            parsed = parse_when(value)
+            if parsed is None:
+                raise ValueError(f'{param} must be an ISO 8601 date or datetime')
+            if param == 'until' and parse_date(value) is not None:
+                parsed, lookup = parsed + timedelta(days=1), 'lt'
+            lookups[f'{field}__{lookup}'] = parsed
+    return lookups
 
-class UserViewSet(viewsets.ModelViewSet):
+
+def rank_change_response(request, model, kind, lookup, key):
+    """Current rank of the ``lookup`` row against its snapshot from ``since`` (default: a day ago)."""
+    since = request.query_params.get('since', None)
+    if since:
+        since = parse_when(since)
+        if since is None:
+            return Response({'error': 'since must be an ISO 8601 date or datetime'}, status=400)
+    else:
+        since = timezone.now() - timedelta(days=1)
+    row = get_collection(model).find_one(lookup, {'rank': 1})
+    if row is None:
+        return Response({'error': f'{key} is not on the board'}, status=404)
+    change = leaderboard.rank_change(kind, key, row['rank'], since)
+    return Response({**lookup, **change})
+
+
+class BaseViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        return self.filtered_response()
+    
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.REPOSITORY_READS:
+            response = super().retrieve(request, *args, **kwargs)
+            fields = self.selected_fields()
+            if fields is not None:
+                response.data = {name: value for name, value in response.data.items() if name in fields}
+            return response
+        row = self.repository.get(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if row is None:
+            raise Http404
+        # As get_object() would; permission classes see the serialized row
+        self.check_object_permissions(request, row)
+        return Response(row)
+    
+    def selected_fields(self):
+        """The fields narrowed by the ``fields``/``exclude`` query parameters, or ``None`` for all."""
+        params = self.request.query_params
+        try:
+            return select_fields(self.get_serializer_class(), params.get('fields', None), params.get('exclude', None))
+        except ValueError as exc:
+            raise ValidationError({'error': str(exc)})
+    
+    def get_repository(self, ordering=None):
+        return repository_for(
+            self.queryset.model, self.get_serializer_class(), self.pagination_class, ordering, self.selected_fields(),
+        )
+    
+    @property
+    def repository(self):
+        return self.get_repository()
+    
+    def filtered_response(self, ordering=None, **filters):
+        """Page through rows matching ORM-style ``filters``, via pymongo unless disabled."""
+        if not settings.REPOSITORY_READS:
+            if ordering:
+                self.paginator.ordering = with_tiebreak(ordering)
+            return self.paginated_response(self.filter_queryset(self.get_queryset()).filter(**filters))
+        try:
+            return Response(self.get_repository(ordering).page(self.request, filters))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+    
+    def paginated_response(self, queryset):
+        # Reads skip model instances and DRF field dispatch; writes still go
+        # through the full serializer_class.
+        serializer = row_serializer_for(self.get_serializer_class(), self.selected_fields())
+        columns = set(serializer.source_fields)
+        ordering = getattr(self.paginator, 'ordering', None)
+        if ordering:
+            # The cursor is read from the ordering fields even when they aren't returned
+            columns.update(field.lstrip('-') for field in ([ordering] if isinstance(ordering, str) else ordering))
+        rows = queryset.values(*columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            with instrumentation.serializing():
+                data = serializer.to_representation(page)
+            return self.get_paginated_response(data)
+        rows = list(rows)
+        with instrumentation.serializing():
+            return Response(serializer.to_representation(rows))
+
+
+class UserViewSet(BaseViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     
@@ -13,13 +144,39 @@ class UserViewSet(viewsets.ModelViewSet):
     def by_email(self, request):
         email = request.query_params.get('email', None)
         if email:
-            users = User.objects.filter(email=email)
-            serializer = self.get_serializer(users, many=True)
-            return Response(serializer.data)
+            return self.filtered_response(email=email)
         return Response({'error': 'Email parameter required'}, status=400)
+    
+    @action(detail=False, methods=['post'])
+    def login(self, request):
+        email = request.data.get('email', None)
+        password = request.data.get('password', None)
+        if not email or not password:
+            return Response({'error': 'Email and password required'}, status=400)
+        user = credentials.authenticate(email, password)
+        if user is None:
+            return Response({'error': 'Invalid email or password'}, status=401)
+        return Response(self.repository.serialize([user])[0])
+    
+    def user_email(self, pk):
+        user = repository_for(User, UserSerializer).get(pk)
+        return user and user['email']
+    
+    @action(detail=True, methods=['get'])
+    @cached_response(
+        ActivityRollup,
+        scope=lambda view, request, pk=None: view.user_email(pk),
+        # The streak runs up to today (UTC), so it changes at midnight without a write
+        vary=lambda view, request, pk=None: timezone.now().date(),
+    )
+    def summary(self, request, pk=None):
+        user_email = self.user_email(pk)
+        if user_email is None:
+            raise Http404
+        return Response(rollups.user_summary(user_email))
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(BaseViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     
@@ -27,58 +184,277 @@ class TeamViewSet(viewsets.ModelViewSet):
     def by_name(self, request):
         name = request.query_params.get('name', None)
         if name:
-            teams = Team.objects.filter(name=name)
-            serializer = self.get_serializer(teams, many=True)
-            return Response(serializer.data)
+            return self.filtered_response(name=name)
         return Response({'error': 'Name parameter required'}, status=400)
+    
+    def change_membership(self, request, pk, change, **kwargs):
+        email = request.data.get('email', None)
+        if not email:
+            return Response({'error': 'Email parameter required'}, status=400)
+        try:
+            team = membership.get_team(pk)
+            change(team, email, **kwargs)
+        except membership.MembershipError as exc:
+            return Response({'error': str(exc)}, status=exc.status)
+        return Response({
+            'team': team['name'],
+            'email': email,
+            'member_count': membership.member_count(team),
+        })
+    
+    @action(detail=True, methods=['post'])
+    def join(self, request, pk=None):
+        return self.change_membership(request, pk, membership.join)
+    
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        return self.change_membership(request, pk, membership.join, move=True)
+    
+    @action(detail=True, methods=['post'])
+    def leave(self, request, pk=None):
+        return self.change_membership(request, pk, membership.leave)
+    
+    @action(detail=True, methods=['get'])
+    def member_count(self, request, pk=None):
+        try:
+            team = membership.get_team(pk)
+        except membership.MembershipError as exc:
+            return Response({'error': str(exc)}, status=exc.status)
+        return Response({'team': team['name'], 'member_count': membership.member_count(team)})
 
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(BaseViewSet):
     queryset = Activity.objects.all()
     serializer_class = ActivitySerializer
+    pagination_class = ActivityPagination
+    bulk_max_items = 5000
+    
+    ordering_choices = ('-date', 'date')
+    
+    def activity_filters(self, request):
+        """ORM lookups for the ``since``/``until``, ``activity_type``, min/max and ``ordering`` parameters.
+        
+        Every combination is answered by one of the ``(..., date, _id)`` indexes.
+        """
+        params = request.query_params
+        try:
+            filters = range_lookups(params, 'date')
+        except ValueError as exc:
+            raise ValidationError({'error': str(exc)})
+        
+        activity_types = [value for value in params.get('activity_type', '').split(',') if value]
+        if len(activity_types) == 1:
+            filters['activity_type'] = activity_types[0]
+        elif activity_types:
+            filters['activity_type__in'] = activity_types
+        
+        for field in ('duration', 'calories'):
+            for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+                param = f'{bound}_{field}'
+                value = params.get(param, None)
+                if value:
+                    try:
+                        filters[f'{field}__{lookup}'] = int(value)
+                    except ValueError:
+                        raise ValidationError({'error': f'{param} must be an integer'})
+        
+        ordering = params.get('ordering', self.ordering_choices[0])
+        if ordering not in self.ordering_choices:
+            raise ValidationError({'error': f'ordering must be one of: {", ".join(self.ordering_choices)}'})
+        return ordering, filters
+    
+    def list(self, request, *args, **kwargs):
+        ordering, filters = self.activity_filters(request)
+        return self.filtered_response(ordering, **filters)
     
     @action(detail=False, methods=['get'])
     def by_user(self, request):
         user_email = request.query_params.get('user_email', None)
         if user_email:
-            activities = Activity.objects.filter(user_email=user_email)
-            serializer = self.get_serializer(activities, many=True)
-            return Response(serializer.data)
+            ordering, filters = self.activity_filters(request)
+            return self.filtered_response(ordering, user_email=user_email, **filters)
         return Response({'error': 'User email parameter required'}, status=400)
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        user_email = request.query_params.get('user_email', None)
+        if not user_email:
+            return Response({'error': 'User email parameter required'}, status=400)
+        bucket = request.query_params.get('bucket', 'week')
+        if bucket not in BUCKETS:
+            return Response({'error': f'bucket must be one of: {", ".join(BUCKETS)}'}, status=400)
+        
+        try:
+            periods = ActivityRollup.objects.filter(
+                user_email=user_email, bucket=bucket, **range_lookups(request.query_params, 'period_start'),
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        
+        serializer = row_serializer_for(ActivityRollupSerializer)
+        rows = periods.order_by('period_start').values(*serializer.source_fields)
+        return Response(serializer.to_representation(rows))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        user_email = request.query_params.get('user_email', None)
+        if user_email:
+            filters, sort = {'user_email': user_email}, [('date', 1)]
+        else:
+            filters, sort = {}, None
+        return export_response(request, Activity, self.get_serializer_class(), 'activities', filters, sort)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Expected a JSON array or NDJSON stream of activities'}, status=400)
+        if len(items) > self.bulk_max_items:
+            return Response({'error': f'At most {self.bulk_max_items} activities per request'}, status=400)
+        
+        child = self.get_serializer(many=True).child
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, child.run_validation(item)))
+            except ValidationError as exc:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': exc.detail}
+        
+        ids = insert_activities([data for _, data in valid])
+        for (index, _), object_id in zip(valid, ids):
+            if object_id is None:
+                results[index] = {'index': index, 'status': 'duplicate'}
+            else:
+                results[index] = {'index': index, 'status': 'created', '_id': str(object_id)}
+        
+        counts = {key: 0 for key in ('created', 'duplicate', 'invalid')}
+        for result in results:
+            counts[result['status']] += 1
+        if counts['invalid']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif counts['created']:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response({**counts, 'results': results}, status=response_status)
 
 
-class LeaderboardViewSet(viewsets.ModelViewSet):
+class LeaderboardViewSet(BaseViewSet):
     queryset = Leaderboard.objects.all().order_by('rank')
     serializer_class = LeaderboardSerializer
+    pagination_class = LeaderboardPagination
+    
+    @cached_response(Leaderboard)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['get'])
+    @cached_response(Leaderboard)
+    def by_team(self, request):
+        team = request.query_params.get('team', None)
+        if team:
+            return self.filtered_response(team=team)
+        return Response({'error': 'Team parameter required'}, status=400)
+    
+    def bounded_int(self, request, param, default):
+        try:
+            value = int(request.query_params.get(param, default))
+        except ValueError:
+            value = 0
+        if not 0 < value <= self.pagination_class.max_page_size:
+            raise ValidationError({'error': f'{param} must be between 1 and {self.pagination_class.max_page_size}'})
+        return value
+    
+    @action(detail=False, methods=['get'])
+    @cached_response(Leaderboard)
+    def top(self, request):
+        k = self.bounded_int(request, 'k', 10)
+        rows = leaderboard.top(k, request.query_params.get('team', None), self.repository.projection)
+        return Response({'results': self.repository.serialize(rows)})
+    
+    @action(detail=False, methods=['get'])
+    @cached_response(Leaderboard)
+    def around(self, request):
+        user_email = request.query_params.get('user_email', None)
+        if not user_email:
+            return Response({'error': 'User email parameter required'}, status=400)
+        n = self.bounded_int(request, 'n', 5)
+        scope = request.query_params.get('scope', 'global')
+        if scope not in ('global', 'team'):
+            return Response({'error': 'scope must be one of: global, team'}, status=400)
+        
+        projection = self.repository.projection
+        row = get_collection(Leaderboard).find_one({'user_email': user_email}, {**projection, 'team': 1})
+        if row is None:
+            return Response({'error': f'{user_email} is not on the board'}, status=404)
+        team = (row.get('team') or None) if scope == 'team' else None
+        if scope == 'team' and team is None:
+            return Response({'error': f'{user_email} is not in a team'}, status=400)
+        rows = leaderboard.around(row, n, team, projection)
+        return Response({'user_email': user_email, 'rank': row['rank'], 'results': self.repository.serialize(rows)})
+    
+    @action(detail=False, methods=['get'])
+    def rank_change(self, request):
+        user_email = request.query_params.get('user_email', None)
+        if user_email:
+            return rank_change_response(request, Leaderboard, 'user', {'user_email': user_email}, user_email)
+        return Response({'error': 'User email parameter required'}, status=400)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        team = request.query_params.get('team', None)
+        filters = {'team': team} if team else {}
+        return export_response(request, Leaderboard, self.get_serializer_class(), 'leaderboard', filters, [('rank', 1)])
+
+
+class TeamStandingViewSet(BaseViewSet):
+    queryset = TeamStanding.objects.all().order_by('rank')
+    serializer_class = TeamStandingSerializer
+    pagination_class = LeaderboardPagination
+    # Maintained from the user leaderboard; never written through the API
+    http_method_names = ['get', 'head', 'options']
+    
+    @cached_response(TeamStanding)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
+    @cached_response(TeamStanding)
     def by_team(self, request):
         team = request.query_params.get('team', None)
         if team:
-            leaderboard = Leaderboard.objects.filter(team=team).order_by('rank')
-            serializer = self.get_serializer(leaderboard, many=True)
-            return Response(serializer.data)
+            return self.filtered_response(team=team)
+        return Response({'error': 'Team parameter required'}, status=400)
+    
+    @action(detail=False, methods=['get'])
+    def rank_change(self, request):
+        team = request.query_params.get('team', None)
+        if team:
+            return rank_change_response(request, TeamStanding, 'team', {'team': team}, team)
         return Response({'error': 'Team parameter required'}, status=400)
 
 
-class WorkoutViewSet(viewsets.ModelViewSet):
+class WorkoutViewSet(BaseViewSet):
     queryset = Workout.objects.all()
     serializer_class = WorkoutSerializer
     
+    @cached_response(Workout)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'])
+    @cached_response(Workout)
     def by_difficulty(self, request):
         difficulty = request.query_params.get('difficulty', None)
         if difficulty:
-            workouts = Workout.objects.filter(difficulty=difficulty)
-            serializer = self.get_serializer(workouts, many=True)
-            return Response(serializer.data)
+            return self.filtered_response(difficulty=difficulty)
         return Response({'error': 'Difficulty parameter required'}, status=400)
     
     @action(detail=False, methods=['get'])
+    @cached_response(Workout)
     def by_activity_type(self, request):
         activity_type = request.query_params.get('activity_type', None)
         if activity_type:
-            workouts = Workout.objects.filter(activity_type=activity_type)
-            serializer = self.get_serializer(workouts, many=True)
-            return Response(serializer.data)
+            return self.filtered_response(activity_type=activity_type)
         return Response({'error': 'Activity type parameter required'}, status=400)